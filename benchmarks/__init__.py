@@ -0,0 +1,144 @@
+import dataclasses
+import datetime
+import tracemalloc
+from typing import Any, Callable, Optional, Tuple, Type
+
+import openpyxl
+from openpyxl.utils import get_column_letter
+
+from xcelios import position, table
+
+# Types of the generated columns (repeating)
+COLUMN_TYPES = (float, int, str, datetime.datetime)
+
+# Excel limit for the number of columns of horizontal tables
+MAX_RECORDS_HORIZONTAL = 16000
+
+# Gap between the table and the footer below/right of it
+FOOTER_GAP = 2
+
+# Value of the cell marking the end of the table
+END_MARKER = 'END'
+
+
+def make_class(n_cols: int) -> Type:
+    """
+    Create a dataset class with the given number of fields.
+
+    :param n_cols: Number of fields
+    :return: Dataclass
+    """
+    fields = [('col_%d' % i, COLUMN_TYPES[i % len(COLUMN_TYPES)])
+              for i in range(n_cols)]
+    return dataclasses.make_dataclass('Record%d' % n_cols, fields)
+
+
+def make_value(typ: Type, i: int) -> Any:
+    if typ is float:
+        return i * 0.5
+    if typ is int:
+        return i
+    if typ is str:
+        return 'item %d' % i
+    return datetime.datetime(2020, 1, 1) + datetime.timedelta(hours=i)
+
+
+def make_record(obj_class: Type, i: int) -> Any:
+    return obj_class(*[
+        make_value(f.type, i + j)
+        for j, f in enumerate(dataclasses.fields(obj_class))
+    ])
+
+
+def make_workbook(n_rows: int,
+                  n_cols: int,
+                  horizontal: bool = False) -> openpyxl.Workbook:
+    """
+    Generate a workbook with a table at A1 (defined name ``table``).
+
+    The table is followed by a footer with an end marker and a SUM formula
+    referencing the first column, so resizing the table has to move cells.
+
+    :param n_rows: Number of datasets
+    :param n_cols: Number of fields
+    :param horizontal: Datasets are columns (header going down)
+    :return: Workbook
+    """
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    obj_class = make_class(n_cols)
+    types = [f.type for f in dataclasses.fields(obj_class)]
+
+    lines = [['col_%d' % j for j in range(n_cols)]]
+    for i in range(n_rows):
+        lines.append([make_value(typ, i + j) for j, typ in enumerate(types)])
+
+    # The footer follows after FOOTER_GAP empty lines
+    if horizontal:
+        lines.extend([[None]] * FOOTER_GAP)
+        lines.append([END_MARKER, '=SUM(B1:%s1)' %
+                      get_column_letter(n_rows + 1)])
+        for j, column in enumerate(lines):
+            for i, value in enumerate(column):
+                if value is not None:
+                    ws.cell(i + 1, j + 1, value)
+    else:
+        for line in lines:
+            ws.append(line)
+        for _ in range(FOOTER_GAP):
+            ws.append([])
+        ws.append([END_MARKER, '=SUM(A2:A%d)' % (n_rows + 1)])
+
+    wb.create_named_range('table', ws, '$A$1')
+    return wb
+
+
+def make_table(wb: openpyxl.Workbook, n_cols: int,
+               horizontal: bool = False) -> table.Table:
+    """
+    Create the table of a generated workbook.
+
+    :param wb: Workbook created by :func:`make_workbook`
+    :param n_cols: Number of fields
+    :param horizontal: Datasets are columns
+    :return: Table
+    """
+    if horizontal:
+        dirs = (position.Direction.DOWN, position.Direction.RIGHT)
+    else:
+        dirs = (position.Direction.RIGHT, position.Direction.DOWN)
+
+    return table.Table(wb.active, position.MarkerName('table'),
+                       make_class(n_cols), *dirs)
+
+
+def run(benchmark,
+        func: Callable,
+        setup: Optional[Callable[[], Tuple[tuple, dict]]] = None,
+        rounds: int = 3) -> Any:
+    """
+    Benchmark a function and record its peak memory usage in
+    ``benchmark.extra_info['peak_memory']`` (bytes).
+
+    Memory is measured in an additional run, because tracing the
+    allocations slows down the code.
+
+    :param benchmark: pytest-benchmark fixture
+    :param func: Function to benchmark
+    :param setup: Function returning the (args, kwargs) of every call,
+                  called outside of the measurement
+    :param rounds: Number of timed runs
+    :return: Result of the last run
+    """
+    result = benchmark.pedantic(func, setup=setup, rounds=rounds)
+
+    args, kwargs = setup() if setup else ((), {})
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        benchmark.extra_info['peak_memory'] = \
+            tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return result
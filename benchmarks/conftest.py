@@ -0,0 +1,22 @@
+# Table sizes (datasets, fields) per benchmark level
+SIZES = {
+    'small': [(1000, 10), (1000, 100)],
+    'medium': [(1000, 10), (1000, 500), (10000, 100), (100000, 10)],
+    'large': [(1000, 10), (1000, 500), (10000, 100), (100000, 10),
+              (100000, 500), (1000000, 10)],
+}
+
+
+def pytest_addoption(parser):
+    parser.addoption('--bench-size',
+                     choices=list(SIZES),
+                     default='small',
+                     help='Table sizes to benchmark (default: small)')
+
+
+def pytest_generate_tests(metafunc):
+    if 'size' in metafunc.fixturenames:
+        sizes = SIZES[metafunc.config.getoption('bench_size')]
+        metafunc.parametrize('size', sizes,
+                             ids=['%dx%d' % s for s in sizes],
+                             scope='module')
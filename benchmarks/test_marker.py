@@ -0,0 +1,48 @@
+import pytest
+
+# noinspection PyUnresolvedReferences
+from benchmarks import END_MARKER, FOOTER_GAP, make_workbook, run
+from xcelios import position
+from xcelios.sheet import ValueIndex
+
+
+@pytest.fixture(scope='module')
+def worksheet(size):
+    return make_workbook(*size).active
+
+
+def _pattern_marker(size) -> position.MarkerPattern:
+    return position.MarkerPattern(position.MarkerPos('A1'),
+                                  '^%s$' % END_MARKER,
+                                  position.Direction.DOWN,
+                                  size[0] + FOOTER_GAP + 1)
+
+
+def test_marker_pattern_scan(benchmark, size, worksheet):
+    marker = _pattern_marker(size)
+
+    def setup():
+        ValueIndex.of(worksheet).invalidate()
+        return (), {}
+
+    pos = run(benchmark, lambda: marker.get_position(worksheet), setup)
+    assert pos.row == size[0] + FOOTER_GAP + 2
+
+
+def test_marker_pattern_indexed(benchmark, size, worksheet):
+    marker = _pattern_marker(size)
+    ValueIndex.of(worksheet).refresh()
+
+    pos = run(benchmark, lambda: marker.get_position(worksheet))
+    assert pos.row == size[0] + FOOTER_GAP + 2
+
+
+def test_marker_search(benchmark, size, worksheet):
+    marker = position.MarkerSearch('^%s$' % END_MARKER)
+
+    def setup():
+        ValueIndex.of(worksheet).invalidate()
+        return (), {}
+
+    pos = run(benchmark, lambda: marker.get_position(worksheet), setup)
+    assert pos.row == size[0] + FOOTER_GAP + 2
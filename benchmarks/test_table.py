@@ -0,0 +1,86 @@
+import pytest
+
+# noinspection PyUnresolvedReferences
+from benchmarks import (MAX_RECORDS_HORIZONTAL, make_record, make_table,
+                        make_workbook, run)
+
+
+@pytest.fixture(scope='module',
+                params=[False, True],
+                ids=['vertical', 'horizontal'])
+def shape(request, size):
+    """(datasets, fields, horizontal)"""
+    n_rows, n_cols = size
+    if request.param:
+        n_rows = min(n_rows, MAX_RECORDS_HORIZONTAL)
+    return n_rows, n_cols, request.param
+
+
+@pytest.fixture(scope='module')
+def workbook(shape):
+    return make_workbook(*shape)
+
+
+def _read_table(shape, wb=None):
+    n_rows, n_cols, horizontal = shape
+    tab = make_table(wb or make_workbook(*shape), n_cols, horizontal)
+    tab.read_datasets()
+    return tab
+
+
+def test_locate_headers(benchmark, shape, workbook):
+    _, n_cols, horizontal = shape
+    run(benchmark, lambda: make_table(workbook, n_cols, horizontal))
+
+
+def test_read_datasets(benchmark, shape, workbook):
+    tab = run(benchmark, lambda: _read_table(shape, workbook))
+    assert len(tab.datasets) == shape[0]
+
+
+def test_write_datasets(benchmark, shape, workbook):
+    def setup():
+        tab = _read_table(shape, workbook)
+        for d in tab.datasets:
+            d.col_0 += 1
+        return (tab, ), {}
+
+    run(benchmark, lambda tab: tab.write_datasets(), setup)
+
+
+def test_write_unchanged(benchmark, shape, workbook):
+    def setup():
+        return (_read_table(shape, workbook), ), {}
+
+    written = run(benchmark, lambda tab: tab.write_datasets(), setup)
+    assert written == 0
+
+
+def test_grow(benchmark, shape):
+    def setup():
+        tab = _read_table(shape)
+        n = len(tab.datasets)
+        tab.datasets.extend(
+            make_record(tab.obj_class, n + i) for i in range(n // 10))
+        return (tab, ), {}
+
+    run(benchmark, lambda tab: tab.write_datasets(), setup)
+
+
+def test_shrink(benchmark, shape):
+    def setup():
+        tab = _read_table(shape)
+        del tab.datasets[-(len(tab.datasets) // 10):]
+        return (tab, ), {}
+
+    run(benchmark, lambda tab: tab.write_datasets(), setup)
+
+
+def test_append(benchmark, shape):
+    def setup():
+        tab = _read_table(shape)
+        n = len(tab.datasets)
+        new = [make_record(tab.obj_class, n + i) for i in range(n // 100)]
+        return (tab, new), {}
+
+    run(benchmark, lambda tab, new: tab.extend(new), setup)
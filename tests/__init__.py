@@ -31,6 +31,21 @@ def worksheet_empty(workbook) -> Worksheet:
     return workbook['SheetE']
 
 
+@pytest.fixture(scope='module')
+def workbook_ro() -> openpyxl.Workbook:
+    wb = openpyxl.load_workbook(FILE_TEST1, read_only=True)
+    yield wb
+    wb.close()
+
+
+@pytest.fixture
+def workbook_rw() -> openpyxl.Workbook:
+    """Fresh copy of the test workbook for tests that modify it"""
+    wb = openpyxl.open(FILE_TEST1)
+    yield wb
+    wb.close()
+
+
 def get_np_attrs(o) -> dict:
     """
     Return all non-protected attributes of the given object.
@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+# noinspection PyUnresolvedReferences
+from tests import DIR_JSON, FILE_TEST1, assert_obj_equals_json_file
+from tests.test_table import Person, Prices
+from xcelios import batch, position
+
+SPECS = [
+    batch.TableSpec(position.MarkerName('table_people'), Person, 'Sheet1'),
+    batch.TableSpec(
+        position.MarkerName('table_prices'), Prices, 'Sheet1',
+        dict(header_dir=position.Direction.DOWN,
+             body_dir=position.Direction.RIGHT)),
+]
+
+
+class CrashPath(os.PathLike):
+    """Path that kills the worker process reading it"""
+
+    def __init__(self):
+        self.pid = os.getpid()
+
+    def __fspath__(self):
+        if os.getpid() != self.pid:
+            os._exit(1)
+        return 'crash.xlsx'
+
+
+@pytest.mark.parametrize('max_workers', [0, 2])
+def test_read_files(max_workers):
+    paths = [FILE_TEST1, 'missing.xlsx', FILE_TEST1]
+    results = list(batch.read_files(paths, SPECS, max_workers=max_workers))
+
+    assert [r.path for r in results] == paths
+    assert [r.ok for r in results] == [True, False, True]
+    assert 'missing.xlsx' in results[1].error
+    assert results[1].tables == []
+
+    for res in (results[0], results[2]):
+        assert_obj_equals_json_file(res.tables[0],
+                                    os.path.join(DIR_JSON, 'people.json'))
+        assert_obj_equals_json_file(res.tables[1],
+                                    os.path.join(DIR_JSON, 'prices.json'))
+
+
+def test_read_files_worker_crash():
+    paths = [FILE_TEST1, CrashPath(), FILE_TEST1, FILE_TEST1, FILE_TEST1]
+    results = list(batch.read_files(paths, SPECS, max_workers=2))
+
+    assert [r.path for r in results] == [FILE_TEST1, 'crash.xlsx'] + \
+        [FILE_TEST1] * 3
+    assert [r.ok for r in results] == [True, False, True, True, True]
+    assert 'BrokenProcessPool' in results[1].error
+
+    for res in results[:1] + results[2:]:
+        assert_obj_equals_json_file(res.tables[0],
+                                    os.path.join(DIR_JSON, 'people.json'))
+
+
+def test_read_file_columns():
+    res = batch.read_file(FILE_TEST1, SPECS[:1], columns=True)
+
+    assert res.ok
+    assert len(res.tables[0]['first_name']) == 17
+
+
+def test_read_file_table_error():
+    spec = batch.TableSpec(position.MarkerName('XYZ'), Person)
+    res = batch.read_file(FILE_TEST1, [spec])
+
+    assert not res.ok
+    assert 'InvalidPositionError' in res.error
@@ -0,0 +1,93 @@
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Optional, Union
+
+import pytest
+
+from xcelios import convert
+
+
+@pytest.mark.parametrize('typ,val,expect', [
+    (str, 'abc', 'abc'),
+    (str, None, ''),
+    (str, 12, '12'),
+    (int, None, 0),
+    (int, 12.7, 12),
+    (int, datetime(2020, 1, 1), None),
+    (float, None, None),
+    (float, 2, 2.0),
+    (datetime, datetime(2020, 1, 1), datetime(2020, 1, 1)),
+    (datetime, 'xyz', None),
+    (datetime, '2020-01-02', datetime(2020, 1, 2)),
+    (date, '2020-01-02', date(2020, 1, 2)),
+    (Optional[str], None, None),
+    (Optional[int], 5.0, 5),
+    (Union[int, str], 'abc', 'abc'),
+    (Union[int, str], 2.5, 2),
+    (Union[int, None, str], None, None),
+])
+def test_converter(typ, val, expect):
+    assert convert.get_converter(typ)(val) == expect
+
+
+@pytest.mark.parametrize('typ', [datetime, Union[datetime, int]])
+def test_converter_date_stateless(typ):
+    conv = convert.get_converter(typ)
+
+    assert conv('01/02/2020') == datetime(2020, 1, 2)
+    assert conv('13/02/2020') == datetime(2020, 2, 13)
+    assert conv('01/02/2020') == datetime(2020, 1, 2)
+
+
+def test_register_converter():
+    class Money:
+        def __init__(self, val):
+            self.cents = round(val * 100)
+
+    convert.register_converter(Money, lambda v: Money(v or 0))
+    try:
+        assert convert.get_converter(Money)(1.5).cents == 150
+        assert convert.get_converter(Optional[Money])(None) is None
+    finally:
+        convert.unregister_converter(Money)
+
+
+@pytest.mark.parametrize('typ,resolved', [
+    (int, int),
+    (Optional[int], int),
+    (Union[str, int], str),
+])
+def test_resolve_type(typ, resolved):
+    assert convert.resolve_type(typ) == resolved
+
+
+@dataclass
+class Item:
+    name: str
+    count: int
+    price: Optional[float]
+
+
+def test_decoder_cached():
+    assert convert.get_decoder(Item) is convert.get_decoder(Item)
+
+
+@pytest.mark.parametrize('keys,raw,expect', [
+    (['name', 'count', 'price'], ('a', 1, None), Item('a', 1, None)),
+    (['price', 'name', 'count'], (2, None, '3'), Item('', 3, 2.0)),
+])
+def test_decode(keys, raw, expect):
+    decode = convert.get_decoder(Item).make_decode(keys)
+
+    assert decode(raw) == expect
+
+
+def test_decode_kwargs():
+    @dataclass
+    class ItemDefault:
+        name: str
+        count: int = 1
+
+    decode = convert.get_decoder(ItemDefault).make_decode(['name'])
+
+    assert decode((None, )) == ItemDefault('', 1)
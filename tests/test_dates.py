@@ -0,0 +1,63 @@
+from datetime import date, datetime
+
+import pytest
+
+from xcelios import dates
+
+
+@pytest.mark.parametrize('val,expect', [
+    (datetime(2020, 1, 2, 3, 4), datetime(2020, 1, 2, 3, 4)),
+    (date(2020, 1, 2), datetime(2020, 1, 2)),
+    ('2020-01-02', datetime(2020, 1, 2)),
+    (' 2020-01-02 13:30:00 ', datetime(2020, 1, 2, 13, 30)),
+    ('02.01.2020', datetime(2020, 1, 2)),
+    ('01/02/2020', datetime(2020, 1, 2)),
+    ('2 Jan 2020', datetime(2020, 1, 2)),
+    (43832, datetime(2020, 1, 2)),
+    (43832.5, datetime(2020, 1, 2, 12)),
+    (0.5, None),
+    ('hello', None),
+    (None, None),
+    (True, None),
+])
+def test_parse_date(val, expect):
+    assert dates.parse_date(val) == expect
+
+
+def test_parser_as_date():
+    parser = dates.DateParser(as_date=True)
+
+    assert parser('2020-01-02') == date(2020, 1, 2)
+    assert parser(None) is None
+
+
+def test_parser_format_detection():
+    parser = dates.DateParser(['%m/%d/%Y', '%d/%m/%Y'])
+
+    assert parser('01/02/2020') == datetime(2020, 1, 2)
+    assert parser.format == '%m/%d/%Y'
+
+    # Switch formats if the detected format does not fit
+    assert parser('13/02/2020') == datetime(2020, 2, 13)
+    assert parser.format == '%d/%m/%Y'
+    assert parser('01/02/2020') == datetime(2020, 2, 1)
+
+
+def test_parser_custom_formats():
+    parser = dates.DateParser(['%Y%m%d'])
+
+    assert parser('20200102') == datetime(2020, 1, 2)
+    assert parser('2020-01-02') is None
+
+
+def test_parse_column():
+    parser = dates.DateParser()
+    col = ['03.01.2020', None, '03.01.2020', 43832, '04.01.2020']
+
+    assert parser.parse_column(col) == [
+        datetime(2020, 1, 3), None,
+        datetime(2020, 1, 3),
+        datetime(2020, 1, 2),
+        datetime(2020, 1, 4)
+    ]
+    assert parser.format == '%d.%m.%Y'
@@ -0,0 +1,64 @@
+from dataclasses import dataclass, field
+
+import pytest
+
+from xcelios import headers
+
+
+@dataclass
+class Contact:
+    first_name: str
+    name: str
+    email: str = field(metadata={'aliases': ['Mail', 'E-Mail address']})
+    favorite_food: str = ''
+
+
+@pytest.mark.parametrize('name,expect', [
+    ('first_name', 'firstname'),
+    ('Favorite Food', 'favoritefood'),
+    ('E-Mail address', 'emailaddress'),
+    (12, '12'),
+])
+def test_normalize_header(name, expect):
+    assert headers.normalize_header(name) == expect
+
+
+@pytest.mark.parametrize('value,expect', [
+    ('First name', 'first_name'),
+    ('FIRST-NAME', 'first_name'),
+    ('FirstName', 'first_name'),
+    ('Name', 'name'),
+    ('Name (full)', 'name'),
+    ('Email', 'email'),
+    ('E-Mail', 'email'),
+    ('mail', 'email'),
+    ('Favorite Food', 'favorite_food'),
+    ('Food', None),
+    ('', None),
+])
+def test_match(value, expect):
+    assert headers.get_matcher(Contact).match(value) == expect
+
+
+def test_match_remaining():
+    matcher = headers.get_matcher(Contact)
+
+    assert matcher.match('Name', {'first_name', 'email'}) is None
+    assert matcher.match('Mail', {'first_name', 'email'}) == 'email'
+
+
+def test_match_alias_str():
+    @dataclass
+    class ContactStr:
+        name: str
+        email: str = field(metadata={'aliases': 'Mail'})
+
+    matcher = headers.HeaderMatcher(ContactStr)
+
+    assert matcher.match('Mail') == 'email'
+    assert matcher.match('M') is None
+    assert matcher.match('a') is None
+
+
+def test_matcher_cached():
+    assert headers.get_matcher(Contact) is headers.get_matcher(Contact)
@@ -0,0 +1,130 @@
+import openpyxl
+import pytest
+
+# noinspection PyUnresolvedReferences
+from tests import FILE_TEST1, workbook, workbook_rw, worksheet
+from tests.test_table import Person, Prices
+from xcelios import layout, position, table
+
+
+def _table(ws, cache, **kwargs):
+    return table.Table(ws, position.MarkerName('table_people'), Person,
+                       layout_cache=cache, **kwargs)
+
+
+def test_layout_cache(worksheet, monkeypatch):
+    cache = layout.LayoutCache()
+    cold = _table(worksheet, cache)
+    assert len(cache) == 1
+
+    # Warm construction skips the marker and header search
+    def fail(*args):
+        raise AssertionError('headers searched')
+
+    monkeypatch.setattr(table.Table, '_locate_headers', fail)
+    monkeypatch.setattr(position.MarkerName, 'get_position', fail)
+    warm = _table(worksheet, cache)
+
+    assert warm.initial_pos == cold.initial_pos
+    assert warm.title_positions == cold.title_positions
+    assert warm.title_range == cold.title_range
+
+    warm.read_datasets()
+    cold.read_datasets()
+    assert warm.datasets == cold.datasets
+
+
+def test_layout_cache_changed_headers(workbook_rw):
+    ws = workbook_rw['Sheet1']
+    cache = layout.LayoutCache()
+    tab = _table(ws, cache)
+
+    # Swap two header cells
+    pos_a = tab.title_positions['email']
+    pos_b = tab.title_positions['height']
+    cell_a, cell_b = pos_a.get_cell(ws), pos_b.get_cell(ws)
+    cell_a.value, cell_b.value = cell_b.value, cell_a.value
+
+    tab = _table(ws, cache)
+    assert tab.title_positions['email'] == pos_b
+    assert tab.title_positions['height'] == pos_a
+
+
+def test_layout_cache_key(worksheet):
+    cache = layout.LayoutCache()
+    marker = position.MarkerName('table_people')
+
+    key = cache.key(worksheet, marker, Person, position.Direction.RIGHT,
+                    position.Direction.DOWN, 1)
+    assert key == cache.key(worksheet, position.MarkerName('table_people'),
+                            Person, position.Direction.RIGHT,
+                            position.Direction.DOWN, 1)
+    assert key != cache.key(worksheet, marker, Prices,
+                            position.Direction.RIGHT,
+                            position.Direction.DOWN, 1)
+    assert cache.key(worksheet, position.MarkerAbs(), Person,
+                     position.Direction.RIGHT, position.Direction.DOWN,
+                     1) is None
+
+
+def test_layout_cache_lru(worksheet):
+    cache = layout.LayoutCache(maxsize=1)
+    _table(worksheet, cache)
+    table.Table(worksheet,
+                position.MarkerName('table_prices'),
+                Prices,
+                position.Direction.DOWN,
+                position.Direction.RIGHT,
+                layout_cache=cache)
+
+    assert len(cache) == 1
+
+
+def test_layout_cache_disk(tmp_path, worksheet):
+    cold = _table(worksheet, layout.LayoutCache(path=tmp_path))
+    assert len(list(tmp_path.glob('*.json'))) == 1
+
+    # New cache (e.g. in another process) reading from disk
+    wb = openpyxl.load_workbook(FILE_TEST1, read_only=True)
+    try:
+        cache = layout.LayoutCache(path=tmp_path)
+        key = cache.key(wb['Sheet1'], position.MarkerName('table_people'),
+                        Person, position.Direction.RIGHT,
+                        position.Direction.DOWN, 1)
+        stored = cache.get(key, wb['Sheet1'])
+
+        assert stored is not None
+        assert stored.title_positions == cold.title_positions
+        assert stored.title_range == cold.title_range
+    finally:
+        wb.close()
+
+
+def test_layout_cache_disk_corrupt(tmp_path, worksheet):
+    _table(worksheet, layout.LayoutCache(path=tmp_path))
+    for f in tmp_path.glob('*.json'):
+        f.write_text('{')
+
+    cache = layout.LayoutCache(path=tmp_path)
+    tab = _table(worksheet, cache)
+    assert tab.title_positions
+
+
+def test_layout_cache_disk_invalid(tmp_path, worksheet):
+    path = tmp_path / 'file'
+    path.write_text('')
+
+    cache = layout.LayoutCache(path=path)
+    tab = _table(worksheet, cache)
+    assert tab.title_positions
+    assert len(cache) == 1
+
+
+@pytest.mark.parametrize('marker', [
+    position.MarkerPos('B2'),
+    position.MarkerPattern(position.MarkerPos('A1'), 'x',
+                           position.Direction.DOWN, 5),
+    position.MarkerSearch('x', position.Range(1, 2, 1, 2)),
+])
+def test_marker_key(marker):
+    assert layout._marker_key(marker) is not None
@@ -1,8 +1,14 @@
+import re
+
+import openpyxl
 import pytest
+from openpyxl.workbook.defined_name import DefinedName
 
 # noinspection PyUnresolvedReferences
-from tests import workbook, worksheet, worksheet_empty
+from tests import workbook, workbook_ro, worksheet, worksheet_empty
 from xcelios import position
+from xcelios.refs import NameIndex
+from xcelios.sheet import ValueIndex
 
 
 @pytest.mark.parametrize('marker,pos_str', [
@@ -17,6 +23,19 @@ def test_marker(worksheet, marker: position.MarkerAbs, pos_str):
     assert str(pos) == pos_str
 
 
+@pytest.mark.parametrize('marker,pos_str', [
+    (position.MarkerName('table_people'), 'B3'),
+    (position.MarkerPattern(position.MarkerName('table_people'), r'^Email$',
+                            position.Direction.RIGHT, 2), 'D3'),
+    (position.MarkerPattern(position.MarkerPos('B1'), r'^Date$',
+                            position.Direction.DOWN, 30), 'B24'),
+])
+def test_marker_read_only(workbook_ro, marker: position.MarkerAbs, pos_str):
+    pos = marker.get_position(workbook_ro['Sheet1'])
+
+    assert str(pos) == pos_str
+
+
 @pytest.mark.parametrize('marker', [
     position.MarkerName('XYZ'),
     position.MarkerPattern(position.MarkerName('table_people'), r'^XYZ$',
@@ -36,3 +55,182 @@ def test_marker_get_cell(worksheet):
     marker = position.MarkerPos('B4')
 
     assert marker.get_cell(worksheet).value == 'Hanson'
+
+
+def test_marker_name_sheet_scope(workbook):
+    # table_people is also defined as a local name of Sheet2
+    marker = position.MarkerName('table_people')
+
+    assert str(marker.get_position(workbook['Sheet1'])) == 'B3'
+    assert str(marker.get_position(workbook['Sheet2'])) == 'B3'
+
+
+@pytest.fixture
+def workbook_names():
+    wb = openpyxl.Workbook()
+    wb.active.title = 'Data'
+    wb.create_sheet("Tom's Sheet")
+
+    for name, text in [
+        ('anchor', "'Tom''s Sheet'!$C$5"),
+        ('area', 'Data!$B$2:$D$9'),
+        ('multi', "(Data!$A$1,'Tom''s Sheet'!$B$2:$C$4)"),
+        ('cols', 'Data!$E:$F'),
+        ('const', '42'),
+    ]:
+        wb.defined_names.append(DefinedName(name, attr_text=text))
+    return wb
+
+
+@pytest.mark.parametrize('name,sheet,range_str', [
+    ('anchor', "Tom's Sheet", 'C5:C5'),
+    ('ANCHOR', "Tom's Sheet", 'C5:C5'),
+    ('area', 'Data', 'B2:D9'),
+    ('multi', 'Data', 'A1:A1'),
+    ('multi', "Tom's Sheet", 'B2:C4'),
+    ('cols', 'Data', 'E1:F1048576'),
+])
+def test_marker_name_areas(workbook_names, name, sheet, range_str):
+    marker = position.MarkerName(name)
+    ws = workbook_names[sheet]
+    rg = marker.get_range(ws)
+
+    assert str(rg) == range_str
+    assert marker.get_position(ws) == position.Position(rg.min_col,
+                                                        rg.min_row)
+
+
+@pytest.mark.parametrize('name', ['const', 'anchor', 'missing'])
+def test_marker_name_areas_err(workbook_names, name):
+    with pytest.raises(position.InvalidPositionError):
+        position.MarkerName(name).get_position(workbook_names['Data'])
+
+
+def test_name_index_new_name(workbook_names):
+    index = NameIndex.of(workbook_names)
+    assert index.get('new') is None
+
+    workbook_names.defined_names.append(
+        DefinedName('new', attr_text='Data!$A$3'))
+
+    assert str(position.MarkerName('new').get_position(
+        workbook_names['Data'])) == 'A3'
+
+
+@pytest.mark.parametrize('marker,pos_str', [
+    (position.MarkerSearch(r'^Date$'), 'B24'),
+    (position.MarkerSearch(r'(?i)^email$'), 'D3'),
+    (position.MarkerSearch(r'^Email$', position.Range.from_str('A4:Q30')),
+     None),
+    (position.MarkerSearch(r'^Wine$', position.Range.from_str('G4:G30')),
+     'G4'),
+    (position.MarkerSearch(r'^Wine$', position.Range.from_str('G5:G30')),
+     None),
+])
+def test_marker_search(workbook, workbook_ro, marker, pos_str):
+    for ws in (workbook['Sheet1'], workbook_ro['Sheet1']):
+        if pos_str is None:
+            with pytest.raises(position.InvalidPositionError):
+                marker.get_position(ws)
+        else:
+            assert str(marker.get_position(ws)) == pos_str
+
+
+def test_marker_search_all(worksheet):
+    marker = position.MarkerSearch(r'^=SUM')
+    positions = marker.get_positions(worksheet)
+
+    assert len(positions) == 15
+    assert str(positions[0]) == 'C28'
+    assert str(positions[-1]) == 'Q28'
+
+
+@pytest.mark.parametrize('direction,max_range,pos_str', [
+    (position.Direction.RIGHT, 20, 'D3'),
+    (position.Direction.RIGHT, 1, None),
+    (position.Direction.LEFT, 20, None),
+])
+def test_marker_pattern_indexed(workbook, direction, max_range, pos_str):
+    ws = workbook['Sheet1']
+    ValueIndex.of(ws).refresh()
+    marker = position.MarkerPattern(position.MarkerPos('B3'), '^Email',
+                                    direction, max_range)
+
+    if pos_str is None:
+        with pytest.raises(position.InvalidPositionError):
+            marker.get_position(ws)
+    else:
+        assert str(marker.get_position(ws)) == pos_str
+
+
+def test_resolve_all(workbook, workbook_ro):
+    markers = {
+        'pos': position.MarkerPos('A3'),
+        'name': position.MarkerName('table_people'),
+        'email': position.MarkerPattern(position.MarkerName('table_people'),
+                                        r'^Email$', position.Direction.RIGHT,
+                                        2),
+        'email_ci': position.MarkerPattern(position.MarkerPos('B3'),
+                                           re.compile('^EMAIL', re.I),
+                                           position.Direction.RIGHT, 10),
+        'nested': position.MarkerPattern(
+            position.MarkerPattern(position.MarkerPos('B1'), r'^Date$',
+                                   position.Direction.DOWN, 30), '^Product',
+            position.Direction.DOWN, 5),
+        'sum': position.MarkerSearch(r'^=SUM'),
+        'sum_d': position.MarkerSearch(r'^=SUM',
+                                       position.Range.from_str('D1:Q30')),
+        'left': position.MarkerPattern(position.MarkerPos('G3'), r'^First',
+                                       position.Direction.LEFT, 10),
+    }
+    expect = {
+        'pos': 'A3',
+        'name': 'B3',
+        'email': 'D3',
+        'email_ci': 'D3',
+        'nested': 'B26',
+        'sum': 'C28',
+        'sum_d': 'D28',
+        'left': 'B3',
+    }
+
+    for ws in (workbook['Sheet1'], workbook_ro['Sheet1']):
+        res = position.resolve_all(ws, markers)
+
+        assert {k: str(v) for k, v in res.items()} == expect
+        assert list(res) == list(markers)
+        for key, marker in markers.items():
+            assert res[key] == marker.get_position(ws)
+
+
+def test_resolve_all_group_numbers():
+    ws = openpyxl.Workbook().active
+    ws['A1'] = 'y'
+    ws['B2'] = '<a>'
+    markers = {
+        'y': position.MarkerSearch(r'^(x)?y'),
+        'a': position.MarkerSearch(r'^(<)?a(?(1)>)$'),
+    }
+
+    assert position.resolve_all(ws, markers) == {
+        'y': position.Position('A1'),
+        'a': position.Position('B2'),
+    }
+
+
+def test_resolve_all_missing(worksheet):
+    marker_set = position.MarkerSet()
+    marker_set.add('a', position.MarkerPos('A3'))
+    marker_set.add('b', position.MarkerName('XYZ'))
+    marker_set.add(
+        'c',
+        position.MarkerPattern(position.MarkerPos('B3'), r'^Email$',
+                               position.Direction.RIGHT, 1))
+    marker_set.add('d', position.MarkerSearch('XYZ'))
+
+    with pytest.raises(position.InvalidPositionError, match='b, c, d'):
+        marker_set.resolve(worksheet)
+
+    assert marker_set.resolve(worksheet, strict=False) == {
+        'a': position.Position('A3')
+    }
@@ -1,7 +1,12 @@
+import copy
+import pickle
+
+import openpyxl
 import pytest
+from openpyxl.comments import Comment
 
 # noinspection PyUnresolvedReferences
-from tests import workbook, worksheet, worksheet_empty
+from tests import workbook, workbook_ro, worksheet, worksheet_empty
 from xcelios import position
 
 
@@ -141,6 +146,38 @@ def test_get_cell(worksheet):
     assert pos.get_cell(worksheet).value == 'Hanson'
 
 
+def test_peek():
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws['B2'] = 'x'
+    ws['B2'].comment = Comment('note', 'me')
+    ws['C3'].style = 'Good'
+
+    assert position.Position('B2').peek_value(ws) == 'x'
+    assert position.Position('B2').peek_comment(ws).text == 'note'
+    assert position.Position('B2').peek_style(ws) is None
+    assert position.Position('C3').peek_style(ws) == 'Good'
+    assert position.Position('C3').peek_cell(ws) is ws['C3']
+
+    n_cells = len(ws._cells)
+    for pos in ('A1', 'D9'):
+        pos = position.Position(pos)
+        assert pos.peek_cell(ws) is None
+        assert pos.peek_value(ws) is None
+        assert pos.peek_comment(ws) is None
+        assert pos.peek_style(ws) is None
+        assert pos.is_cell_empty(ws)
+
+    assert len(ws._cells) == n_cells
+
+
+def test_peek_read_only(workbook_ro):
+    ws = workbook_ro['Sheet1']
+
+    assert position.Position('B4').peek_value(ws) == 'Hanson'
+    assert position.Position('A1').peek_cell(ws) is None
+
+
 @pytest.mark.parametrize('pos,empty', [
     ('A1', True),
     ('B3', False),
@@ -157,3 +194,56 @@ def test_is_cell_empty(worksheet, pos, empty):
 ])
 def test_get_coord(pos, axis, coord):
     assert position.Position(pos).get_coord(axis) == coord
+
+
+@pytest.mark.parametrize('pos,direction,count,values', [
+    ('B3', position.Direction.RIGHT, 3, ['First name', 'Last Name', 'Email']),
+    ('A3', position.Direction.RIGHT, 2, [None, 'First name']),
+    ('B5', position.Direction.UP, 6,
+     ['Fulvia', 'Hanson', 'First name', None, None]),
+    ('G3', position.Direction.RIGHT, None, ['Favorite Food'] + [None] * 10),
+])
+def test_iter_direction_values(worksheet, pos, direction, count, values):
+    vals = position.iter_direction_values(worksheet, position.Position(pos),
+                                          direction, count)
+
+    assert list(vals) == values
+
+
+def test_position_hash():
+    positions = {position.Position('A1'): 1, position.Position(2, 3): 2}
+
+    assert positions[position.Position(1, 1)] == 1
+    assert positions[position.Position('B3')] == 2
+    assert len({position.Position('C4'), position.Position(3, 4)}) == 1
+
+
+def test_position_immutable():
+    pos = position.Position('A1')
+
+    with pytest.raises(AttributeError):
+        pos.row = 5
+    with pytest.raises(AttributeError):
+        pos.x = 5
+    with pytest.raises(AttributeError):
+        del pos.col
+
+    assert pos == position.Position('A1')
+
+
+def test_position_copy():
+    pos = position.Position('C7')
+
+    assert pickle.loads(pickle.dumps(pos)) == pos
+    assert copy.copy(pos) == pos
+    assert copy.deepcopy(pos) == pos
+
+
+def test_shifted_err():
+    with pytest.raises(position.InvalidPositionError):
+        position.Position('A1').shifted(position.Direction.UP)
+
+
+def test_combine_int_err():
+    with pytest.raises(position.InvalidPositionError):
+        position.Position('A1').combine(position.Axis.COL, 0)
@@ -1,5 +1,8 @@
+import openpyxl
 import pytest
 
+# noinspection PyUnresolvedReferences
+from tests import workbook_ro
 from xcelios.position import (Direction, InvalidPositionError,
                               InvalidRangeError, Position, Range)
 
@@ -46,3 +49,31 @@ def test_is_inside(rg, pos, is_in):
 ])
 def test_extended(rg, direction, distance, n_rg):
     assert rg.extended(direction, distance) == n_rg
+
+
+def test_peek():
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws['B3'] = 'a'
+    ws['C4'] = 'b'
+    ws['E9'] = 'c'
+
+    rg = Range.from_str('A3:C4')
+
+    assert rg.peek_values(ws) == [(None, 'a', None), (None, None, 'b')]
+    assert list(rg.peek_cells(ws)) == [Position('B3'), Position('C4')]
+    assert list(Range.from_str('A1:Z99').peek_cells(ws)) == \
+        [Position('B3'), Position('C4'), Position('E9')]
+    assert len(ws._cells) == 3
+
+
+def test_peek_read_only(workbook_ro):
+    ws = workbook_ro['Sheet1']
+    rg = Range.from_str('A3:C4')
+
+    assert rg.peek_values(ws) == [(None, 'First name', 'Last Name'),
+                                  (None, 'Hanson', 'Marnane')]
+    assert list(rg.peek_cells(ws)) == [
+        Position('B3'), Position('C3'),
+        Position('B4'), Position('C4')
+    ]
@@ -0,0 +1,135 @@
+from dataclasses import dataclass
+
+import openpyxl
+import pytest
+from openpyxl.formatting.rule import FormulaRule
+from openpyxl.workbook.defined_name import DefinedName
+from openpyxl.worksheet.datavalidation import DataValidation
+
+# noinspection PyUnresolvedReferences
+from tests import workbook_rw
+from xcelios import position, table
+from xcelios.refs import CellRef, Formula, ReferenceIndex
+
+
+@dataclass
+class Name:
+    first_name: str
+    last_name: str
+
+
+@pytest.mark.parametrize('ref,expect', [
+    ('A1', 'A1'),
+    ('$B$3:c4', '$B$3:C4'),
+    ("'My ''Sheet'!A1", "'My ''Sheet'!A1"),
+    ('Sheet1!A:C', 'Sheet1!A:C'),
+    ('2:$5', '2:$5'),
+    ('table_people', None),
+    ('abc', None),
+    ('A', None),
+    ('A0', None),
+    ('A1:B', None),
+])
+def test_parse_ref(ref, expect):
+    res = CellRef.parse(ref)
+
+    if expect is None:
+        assert res is None
+    else:
+        assert str(res) == expect
+
+
+@pytest.mark.parametrize('ref,start,delta,by_row,expect', [
+    ('A3', 4, 2, True, 'A3'),
+    ('A4', 4, 2, True, 'A6'),
+    ('A1:A4', 4, 2, True, 'A1:A6'),
+    ('A5:A1', 4, 2, True, 'A7:A1'),
+    ('B1:B10', 4, 2, False, 'B1:B10'),
+    ('D1:E5', 4, 2, False, 'F1:G5'),
+    ('A:A', 4, 2, True, 'A:A'),
+    ('3:4', 4, 2, True, '3:6'),
+    ('A7', 7, -3, True, 'A4'),
+    ('A5', 7, -3, True, '#REF!'),
+    ('S!A4:A6', 7, -3, True, 'S!#REF!'),
+    ('A1:A6', 7, -3, True, 'A1:A3'),
+    ('A5:A9', 7, -3, True, 'A4:A6'),
+    ('A1048576', 4, 2, True, '#REF!'),
+])
+def test_shift_ref(ref, start, delta, by_row, expect):
+    res = CellRef.parse(ref)
+    res.shift(start, delta, by_row)
+
+    assert str(res) == expect
+
+
+def test_formula():
+    f = Formula("=SUM(A1:A4)+'Other'!A5*Data!A:A+\"A5\"", 'Data')
+
+    assert f.sheets == {'data', 'other'}
+    assert f.shift('DATA', 4, 2)
+    assert f.text == "=SUM(A1:A6)+'Other'!A5*Data!A:A+\"A5\""
+    assert not f.shift('Data', 8, 1)
+    assert f.shift('other', 1, 1)
+    assert f.text == "=SUM(A1:A6)+'Other'!A6*Data!A:A+\"A5\""
+
+
+def test_reference_index():
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'Data'
+    other = wb.create_sheet('Other')
+
+    ws['A5'] = '=SUM(A1:A4)'
+    ws['B2'] = '=$A$5*A6'
+    other['A1'] = '=Data!A3+Data!A1:A7'
+    wb.defined_names.append(
+        DefinedName('multi', attr_text='Data!$A$1,Data!$A$6:$B$8'))
+    ws.merge_cells('C4:D8')
+    dv = DataValidation(type='list', formula1='$A$1:$A$9')
+    dv.add('E3:E9')
+    ws.add_data_validation(dv)
+    ws.conditional_formatting.add('F1:F10',
+                                  FormulaRule(formula=['F1>$A$7']))
+
+    idx = ReferenceIndex.of(wb)
+    assert ReferenceIndex.of(wb) is idx
+
+    ws['B3'] = '=A8'
+    idx.update(ws['B3'])
+    idx.shift(ws, 4, 2)
+
+    assert ws['A5'].value == '=SUM(A1:A6)'
+    assert ws['B2'].value == '=$A$7*A8'
+    assert ws['B3'].value == '=A10'
+    assert other['A1'].value == '=Data!A3+Data!A1:A9'
+    assert wb.defined_names['multi'].attr_text == \
+        'Data!$A$1,Data!$A$8:$B$10'
+    assert str(ws.merged_cells) == 'C6:D10'
+    assert str(dv.sqref) == 'E3:E11'
+    assert dv.formula1 == '$A$1:$A$11'
+
+    cf = list(ws.conditional_formatting)
+    assert str(cf[0].sqref) == 'F1:F12'
+    assert cf[0].rules[0].formula == ['F1>$A$9']
+
+    idx.shift(ws, 9, -4)
+
+    assert ws['A5'].value == '=SUM(A1:A4)'
+    assert ws['B2'].value == '=#REF!*#REF!'
+    assert ws['B3'].value == '=A6'
+    assert other['A1'].value == '=Data!A3+Data!A1:A5'
+    assert str(ws.merged_cells) == 'C5:D6'
+
+
+def test_table_resize_updates_references(workbook_rw):
+    ws = workbook_rw['Sheet1']
+    ws['Q1'] = '=SUM(C24:C30)+C4'
+
+    tab = table.Table(ws, position.MarkerName('table_people'), Name)
+    tab.read_datasets()
+    tab.datasets += tab.datasets[:3]
+    tab.write_datasets()
+
+    assert ws['Q1'].value == '=SUM(C27:C33)+C4'
+    assert position.MarkerName('table_prices').get_position(ws) == \
+        position.Position('B27')
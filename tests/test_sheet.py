@@ -0,0 +1,222 @@
+import gc
+import re
+import weakref
+from dataclasses import dataclass
+
+import openpyxl
+import pytest
+from openpyxl.comments import Comment
+from openpyxl.styles import Font
+
+# noinspection PyUnresolvedReferences
+from tests import FILE_TEST1, workbook, workbook_rw
+from xcelios import position, table
+from xcelios.sheet import OccupancyIndex, SheetBounds, ValueIndex, move_lines
+
+
+@pytest.mark.parametrize('sname,bounds', [
+    ('Sheet1', (3, 28, 2, 17)),
+    ('SheetE', (1, 1, 1, 1)),
+])
+def test_bounds(workbook, sname, bounds):
+    b = SheetBounds.of(workbook[sname])
+
+    assert (b.min_row, b.max_row, b.min_col, b.max_col) == bounds
+
+
+def test_bounds_shared(workbook):
+    assert SheetBounds.of(workbook['Sheet1']) is SheetBounds.of(
+        workbook['Sheet1'])
+    assert SheetBounds.of(workbook['Sheet1']) is not SheetBounds.of(
+        workbook['Sheet2'])
+
+
+def test_bounds_contains(workbook):
+    b = SheetBounds.of(workbook['Sheet1'])
+
+    assert position.Position('B3') in b
+    assert position.Position('A3') not in b
+    assert b.contains(28, 17)
+    assert not b.contains(29, 17)
+
+
+def test_bounds_invalidate():
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    b = SheetBounds.of(ws)
+    assert b.max_row == 1
+
+    # Changes made outside xcelios are not picked up automatically
+    ws['C5'] = 'x'
+    assert b.max_row == 1
+
+    b.invalidate()
+    assert (b.min_row, b.max_row, b.min_col, b.max_col) == (5, 5, 3, 3)
+
+
+def test_bounds_after_move(workbook_rw):
+    ws = workbook_rw['Sheet1']
+    b = SheetBounds.of(ws)
+    assert b.max_row == 28
+
+    table.insert_rows_cols_withref(ws, 22, position.Axis.ROW, 3)
+
+    assert b.max_row == 31
+
+
+def _occupancy_data(occ: OccupancyIndex):
+    occ._ensure()
+    return occ._rows, occ._cols
+
+
+def test_occupancy(workbook):
+    occ = OccupancyIndex.of(workbook['Sheet1'])
+
+    assert occ is OccupancyIndex.of(workbook['Sheet1'])
+    assert occ.cols_in_row(3) == set(range(2, 8))
+    assert occ.rows_in_col(8) == {24, 26, 27, 28}
+    assert occ.cols_in_row(22) == set()
+    assert not occ.is_empty(4, 2)
+    assert occ.is_empty(1, 1)
+
+
+@pytest.mark.parametrize('fixed,start,step,by_row,expect', [
+    (2, 20, 1, True, 24),
+    (2, 24, -1, True, 20),
+    (8, 3, 1, True, 24),
+    (24, 2, 1, False, 3),
+    (24, 17, 1, False, None),
+])
+def test_occupancy_next(workbook, fixed, start, step, by_row, expect):
+    occ = OccupancyIndex.of(workbook['Sheet1'])
+
+    assert occ.next_occupied(fixed, start, step, by_row) == expect
+
+
+def test_occupancy_style():
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws['B2'].font = Font(bold=True)
+    ws['C3'].value = None
+    ws['D4'].comment = Comment('Hello', 'me')
+
+    occ = OccupancyIndex.of(ws)
+
+    assert _occupancy_data(occ) == ({2: {2}, 4: {4}}, {2: {2}, 4: {4}})
+
+
+def test_occupancy_update():
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws['A1'] = 1
+    occ = OccupancyIndex.of(ws)
+    assert occ.cols_in_row(1) == {1}
+
+    ws['A1'] = None
+    occ.update(ws['A1'])
+    ws['B2'] = 2
+    occ.update(ws['B2'])
+
+    assert _occupancy_data(occ) == ({2: {2}}, {2: {2}})
+
+
+@pytest.mark.parametrize('index,n,axis', [
+    (22, 3, position.Axis.ROW),
+    (10, -2, position.Axis.ROW),
+    (5, 2, position.Axis.COL),
+    (4, -1, position.Axis.COL),
+])
+def test_occupancy_after_move(workbook_rw, index, n, axis):
+    ws = workbook_rw['Sheet1']
+    occ = OccupancyIndex.of(ws)
+    occ._ensure()
+
+    table.insert_rows_cols_withref(ws, index, axis, n)
+
+    assert _occupancy_data(occ) == _occupancy_data(OccupancyIndex(ws))
+
+
+def _values(ws):
+    return {k: c.value for k, c in ws._cells.items()}
+
+
+def test_move_lines_rows():
+    ws = openpyxl.Workbook().active
+    ws['A1'] = 1
+    ws['A2'] = 2
+    ws['B3'] = '=A1+A2'
+
+    move_lines(ws, 2, 2)
+
+    assert _values(ws) == {(1, 1): 1, (4, 1): 2, (5, 2): '=A3+A4'}
+    assert ws['B5'].row == 5
+
+    move_lines(ws, 4, -2)
+
+    assert _values(ws) == {(1, 1): 1, (2, 1): 2, (3, 2): '=A1+A2'}
+
+
+def test_move_lines_delete_cols():
+    ws = openpyxl.Workbook().active
+    for row in [[1, 2, 3, 4, '=D1'], [5, 6, 7, 8, None]]:
+        ws.append(row)
+
+    move_lines(ws, 4, -2, by_row=False)
+
+    assert _values(ws) == {
+        (1, 1): 1,
+        (1, 2): 4,
+        (1, 3): '=B1',
+        (2, 1): 5,
+        (2, 2): 8,
+        (2, 3): None,
+    }
+
+
+def test_move_lines_error():
+    ws = openpyxl.Workbook().active
+
+    with pytest.raises(ValueError):
+        move_lines(ws, 2, -2)
+
+
+def test_value_index():
+    ws = openpyxl.Workbook().active
+    ws['B2'] = 'Total'
+    ws['A5'] = 'total'
+    ws['C1'] = 12
+    index = ValueIndex.of(ws)
+
+    assert index.find(re.compile('(?i)total')) == [(2, 2), (5, 1)]
+    assert index.find(re.compile('(?i)total'), first=True) == [(2, 2)]
+    assert index.find(re.compile('(?i)total'), min_row=3) == [(5, 1)]
+    assert index.find(re.compile('^12$')) == [(1, 3)]
+    assert len(index) == 3
+
+    ws['D1'] = 'Total'
+    index.invalidate()
+    assert index.find(re.compile('^Total'), max_row=2) == [(1, 4), (2, 2)]
+
+
+@dataclass
+class Name:
+    first_name: str
+    last_name: str
+
+
+@pytest.mark.parametrize('read_only', [False, True])
+def test_caches_collected(read_only):
+    refs = []
+    for _ in range(3):
+        wb = openpyxl.load_workbook(FILE_TEST1, read_only=read_only)
+        tab = table.Table(wb['Sheet1'], position.MarkerName('table_people'),
+                          Name)
+        tab.read_datasets()
+        if not read_only:
+            tab.write_datasets()
+        wb.close()
+        refs.append(weakref.ref(wb))
+        del wb, tab
+
+    gc.collect()
+    assert all(ref() is None for ref in refs)
@@ -0,0 +1,73 @@
+from openpyxl.cell.cell import Cell
+
+# noinspection PyUnresolvedReferences
+from tests import workbook, workbook_rw, worksheet
+from tests.test_table import Person
+from xcelios import position, stats, table
+
+
+def test_collect(worksheet):
+    phases = []
+
+    with stats.collect(callback=lambda p, s: phases.append(p)) as st:
+        tab = table.Table(worksheet, position.MarkerName('table_people'),
+                          Person)
+        tab.read_datasets()
+
+    assert phases == ['marker.name', 'locate_headers', 'read_datasets']
+    assert st.calls == {p: 1 for p in phases}
+    assert all(t >= 0 for t in st.times.values())
+
+    # 7 header cells (up to the one after the last header),
+    # 17 datasets and 2 blank lines ending the table with 6 cells each
+    assert st.counts['cells_read'] == 7 + 19 * 6
+    assert st.counts['positions'] > 0
+    assert 'cells_created' not in st.counts
+
+
+def test_collect_write(workbook_rw):
+    ws = workbook_rw['Sheet1']
+    tab = table.Table(ws, position.MarkerName('table_people'), Person)
+    tab.read_datasets()
+    tab.datasets.append(tab.datasets[0])
+
+    with stats.collect() as st:
+        written = tab.write_datasets()
+
+    assert st.calls['write_datasets'] == 1
+    assert st.calls['adjust_space'] == 1
+    assert st.calls['move_lines'] == 1
+    assert st.counts['lines_inserted'] == 1
+    assert st.counts['cells_written'] == written
+    assert st.counts['cells_created'] == written
+
+
+def test_collect_nested(worksheet):
+    outer = stats.Stats()
+
+    with stats.collect(outer):
+        with stats.collect() as inner:
+            position.MarkerName('table_people').get_position(worksheet)
+        position.MarkerName('table_people').get_position(worksheet)
+
+    assert inner.calls == {'marker.name': 1}
+    assert outer.calls == {'marker.name': 2}
+
+
+def test_disabled(worksheet):
+    init = Cell.__init__
+
+    with stats.collect() as st:
+        assert stats.enabled()
+        assert Cell.__init__ is not init
+
+    assert not stats.enabled()
+    assert Cell.__init__ is init
+
+    position.MarkerName('table_people').get_position(worksheet)
+    assert st.calls == dict()
+
+    st.add('x', 2)
+    assert st.as_dict() == {'times': {}, 'calls': {}, 'counts': {'x': 2}}
+    st.reset()
+    assert st.counts == dict()
@@ -1,12 +1,15 @@
 import os
-from dataclasses import dataclass
-from datetime import datetime
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Optional
 
+import openpyxl
 import pytest
 
 # noinspection PyUnresolvedReferences
-from tests import DIR_JSON, assert_obj_equals_json_file, workbook, worksheet
-from xcelios import position, table
+from tests import (DIR_JSON, assert_obj_equals_json_file, workbook,
+                   workbook_ro, workbook_rw, worksheet)
+from xcelios import position, stats, table
 
 
 @dataclass
@@ -101,3 +104,561 @@ def test_read_datasets(worksheet, marker_name, args, json_file):
 
     assert_obj_equals_json_file(tab.datasets,
                                 os.path.join(DIR_JSON, json_file))
+
+
+@pytest.mark.parametrize('marker_name,args,json_file', [
+    ('table_people', [Person], 'people.json'),
+    ('table_prices', [
+        Prices, position.Direction.DOWN, position.Direction.RIGHT
+    ], 'prices.json'),
+])
+def test_read_datasets_read_only(workbook_ro, marker_name, args, json_file):
+    ws = workbook_ro['Sheet1']
+    tab = table.Table(ws, position.MarkerName(marker_name), *args)
+    tab.read_datasets()
+
+    assert_obj_equals_json_file(tab.datasets,
+                                os.path.join(DIR_JSON, json_file))
+
+
+def test_read_datasets_no_cells_created(workbook_rw):
+    ws = workbook_rw['Sheet1']
+    n_cells = len(ws._cells)
+
+    tab = table.Table(ws, position.MarkerName('table_people'), Person)
+    tab.read_datasets()
+
+    assert len(tab.datasets) == 17
+    assert len(ws._cells) == n_cells
+
+
+def test_iter_datasets(worksheet):
+    tab = table.Table(worksheet, position.MarkerName('table_people'), Person)
+    it = tab.iter_datasets()
+
+    assert tab.datasets == []
+    assert next(it).first_name == 'Hanson'
+    assert len(list(it)) == 16
+    assert tab.datasets == []
+    assert tab.final_pos == position.Position('B20')
+
+
+def test_iter_datasets_stopped(worksheet):
+    tab = table.Table(worksheet, position.MarkerName('table_people'), Person)
+
+    for i, d in enumerate(tab.iter_datasets()):
+        if i == 2:
+            break
+
+    assert tab.final_pos == position.Position('B6')
+
+
+def test_iter_batches(worksheet):
+    tab = table.Table(worksheet, position.MarkerName('table_people'), Person)
+    batches = list(tab.iter_batches(5))
+
+    assert [len(b) for b in batches] == [5, 5, 5, 2]
+    assert batches[3][1].first_name == 'Ewart'
+
+    with pytest.raises(ValueError):
+        next(tab.iter_batches(0))
+
+
+def test_read_columns(worksheet):
+    np = pytest.importorskip('numpy')
+
+    tab = table.Table(worksheet, position.MarkerName('table_people'), Person)
+    cols = tab.read_columns()
+
+    assert list(cols.keys()) == [
+        'first_name', 'last_name', 'email', 'birthday', 'height',
+        'favorite_food'
+    ]
+    assert cols['first_name'].dtype == object
+    assert cols['first_name'][0] == 'Hanson'
+    assert cols['birthday'].dtype == np.dtype('datetime64[us]')
+    assert cols['birthday'][0] == np.datetime64('1988-06-26')
+    assert cols['height'].dtype == np.int64
+    assert cols['height'].sum() == 2937
+    assert len(cols['email']) == 17
+    assert tab.final_pos == position.Position('B20')
+
+
+def test_read_columns_prices(worksheet):
+    np = pytest.importorskip('numpy')
+
+    tab = table.Table(worksheet, position.MarkerName('table_prices'), Prices,
+                      position.Direction.DOWN, position.Direction.RIGHT)
+    cols = tab.read_columns()
+
+    assert cols['product_a'].dtype == np.float64
+    assert cols['product_a'][0] == 87.87
+    assert not cols['product_a'].mask.any()
+    assert cols['sum'][0] == '=SUM(C26:C27)'
+
+
+def test_read_columns_blanks():
+    np = pytest.importorskip('numpy')
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(['Date', 'Product A', 'Product B', 'Sum'])
+    ws.append([datetime(2020, 1, 1), 1.5, None, 'x'])
+    ws.append([None, None, 2, None])
+
+    tab = table.Table(ws, position.MarkerPos('A1'), Prices)
+    cols = tab.read_columns()
+
+    assert cols['product_a'].mask.tolist() == [False, True]
+    assert cols['product_b'].mask.tolist() == [True, False]
+    assert cols['product_b'][1] == 2.0
+    assert np.isnat(cols['date'][1])
+    assert cols['sum'].tolist() == ['x', '']
+
+
+@dataclass
+class PricesAliased:
+    day: datetime = field(metadata={'aliases': ['Date']})
+    a: float = field(metadata={'aliases': ['Product A']})
+    b: float = field(metadata={'aliases': ['Product B']})
+
+
+def test_table_headers_aliases(worksheet):
+    tab = table.Table(worksheet, position.MarkerName('table_prices'),
+                      PricesAliased, position.Direction.DOWN,
+                      position.Direction.RIGHT)
+    ref = table.Table(worksheet, position.MarkerName('table_prices'), Prices,
+                      position.Direction.DOWN, position.Direction.RIGHT)
+    tab.read_datasets()
+
+    assert tab.title_positions['a'] == ref.title_positions['product_a']
+    assert tab.datasets[0].a == 87.87
+
+
+@dataclass
+class Event:
+    name: str
+    start: datetime
+    end: Optional[date]
+
+
+def test_read_date_strings():
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(['Name', 'Start', 'End'])
+    ws.append(['A', '2020-03-01', '01/03/2020'])
+    ws.append(['B', 43832, None])
+    ws.append(['C', datetime(2020, 1, 2), '13/03/2020'])
+
+    tab = table.Table(ws,
+                      position.MarkerPos('A1'),
+                      Event,
+                      date_formats=['%Y-%m-%d', '%d/%m/%Y'])
+    tab.read_datasets()
+
+    assert tab.datasets == [
+        Event('A', datetime(2020, 3, 1), date(2020, 3, 1)),
+        Event('B', datetime(2020, 1, 2), None),
+        Event('C', datetime(2020, 1, 2), date(2020, 3, 13)),
+    ]
+
+
+@pytest.mark.parametrize('n_datasets,prices_row', [
+    (17, 24),
+    (20, 27),
+    (15, 22),
+])
+def test_write_datasets_resize(workbook_rw, n_datasets, prices_row):
+    ws = workbook_rw['Sheet1']
+    tab = table.Table(ws, position.MarkerName('table_people'), Person)
+    tab.read_datasets()
+    people = tab.datasets
+
+    tab.datasets = (people * 2)[:n_datasets]
+    tab.write_datasets()
+
+    assert ws.cell(prices_row, 2).value == 'Date'
+    assert ws.cell(prices_row + 4, 3).value == '=SUM(C%d:C%d)' % (
+        prices_row + 2, prices_row + 3)
+
+    tab = table.Table(ws, position.MarkerName('table_people'), Person)
+    tab.read_datasets()
+
+    assert tab.datasets == (people * 2)[:n_datasets]
+
+
+def test_write_datasets_changed_only(workbook_rw):
+    ws = workbook_rw['Sheet1']
+    tab = table.Table(ws, position.MarkerName('table_people'), Person)
+    tab.read_datasets()
+
+    assert tab.write_datasets() == 0
+
+    tab.datasets[2].first_name = 'Napo'
+    tab.datasets[3].height = 191
+    assert tab.write_datasets() == 2
+    assert ws['B6'].value == 'Napo'
+    assert ws['F7'].value == 191
+
+    # Same value with a different type
+    tab.datasets[3].height = 191.0
+    assert tab.write_datasets() == 1
+    assert tab.write_datasets() == 0
+
+    tab.discard_snapshot()
+    assert tab.write_datasets() == 6 * len(tab.datasets)
+
+
+@dataclass
+class Measure:
+    name: str
+    count: int
+    value: float
+
+
+def test_write_datasets_lossy_cast():
+    ws = openpyxl.Workbook().active
+    ws.append(['Name', 'Count', 'Value'])
+    ws.append(['a', None, 2])
+    ws.append([None, 3, 2.5])
+    ws.append(['c', 4, None])
+    tab = table.Table(ws, position.MarkerPos('A1'), Measure)
+    tab.read_datasets()
+
+    assert tab.datasets == [
+        Measure('a', 0, 2.0),
+        Measure('', 3, 2.5),
+        Measure('c', 4, None),
+    ]
+    assert tab.write_datasets() == 0
+    assert ws['B2'].value is None
+    assert ws['A3'].value is None
+    assert ws['C2'].value == 2 and isinstance(ws['C2'].value, int)
+
+    tab.datasets[0].count = 5
+    assert tab.write_datasets() == 1
+    assert ws['B2'].value == 5
+
+
+def test_extend(workbook_rw):
+    ws = workbook_rw['Sheet1']
+    tab = table.Table(ws, position.MarkerName('table_people'), Person)
+    tab.read_datasets()
+    people = list(tab.datasets)
+
+    # Changes of existing datasets are not written
+    tab.datasets[0] = people[1]
+
+    assert tab.append(people[0]) == 6
+    assert tab.extend(people[1:3]) == 12
+    assert tab.extend([]) == 0
+    assert tab.final_pos == position.Position('B23')
+    assert ws.cell(27, 2).value == 'Date'
+
+    tab = table.Table(ws, position.MarkerName('table_people'), Person)
+    tab.read_datasets()
+    assert tab.datasets == people + people[:3]
+
+
+def test_extend_insert_inside_table():
+    ws = openpyxl.Workbook().active
+    ws.append(['Date', 'ProductA', 'ProductB', 'Sum'])
+    for i in range(4):
+        ws.append([datetime(2020, 1, i + 1), i, i * 2.0, None])
+    # The row after the table is not empty, so new rows are inserted
+    # before the last line of the table
+    ws['F6'] = 'x'
+    ws['A7'] = 'Footer'
+
+    tab = table.Table(ws, position.MarkerPos('A1'), Prices, max_blanks=0)
+    tab.read_datasets()
+    prices = list(tab.datasets)
+    new = [Prices(datetime(2021, 1, 1), 5.0, 6.0, ''),
+           Prices(datetime(2021, 1, 2), 7.0, 8.0, '')]
+    tab.extend(new)
+
+    assert ws['A9'].value == 'Footer'
+    tab = table.Table(ws, position.MarkerPos('A1'), Prices, max_blanks=0)
+    tab.read_datasets()
+    assert tab.datasets == prices + new
+
+
+def test_extend_not_in_sync(workbook_rw):
+    ws = workbook_rw['Sheet1']
+    tab = table.Table(ws, position.MarkerName('table_people'), Person)
+    tab.read_datasets()
+    people = list(tab.datasets)
+
+    # Removed datasets have to be written with the whole table
+    del tab.datasets[:2]
+    tab.extend(people[:2])
+
+    tab = table.Table(ws, position.MarkerName('table_people'), Person)
+    tab.read_datasets()
+    assert tab.datasets == people[2:] + people[:2]
+    assert ws.cell(24, 2).value == 'Date'
+
+
+def _people_table(ws) -> table.Table:
+    tab = table.Table(ws, position.MarkerName('table_people'), Person)
+    tab.read_datasets()
+    return tab
+
+
+@pytest.mark.parametrize('edit', [
+    lambda j, p: j.insert(3, p[0]),
+    lambda j, p: j.insert(0, p[5]),
+    lambda j, p: j.__delitem__(4),
+    lambda j, p: [j.__delitem__(0) for _ in range(3)],
+    lambda j, p: j.__setitem__(-1, p[0]),
+    lambda j, p: (j.insert(2, p[1]), j.__delitem__(10), j.append(p[2])),
+    lambda j, p: (j.insert(5, p[1]), j.__delitem__(5)),
+    lambda j, p: j.reverse(),
+])
+def test_journal(workbook_rw, edit):
+    ws = workbook_rw['Sheet1']
+    tab = _people_table(ws)
+    people = list(tab.datasets)
+    expected = list(people)
+    edit(expected, people)
+
+    journal = tab.track()
+    edit(journal, people)
+    assert tab.datasets == expected
+
+    journal.commit()
+    assert not journal.changed
+    assert ws.cell(24 + len(expected) - 17, 2).value == 'Date'
+
+    tab = _people_table(ws)
+    assert tab.datasets == expected
+
+
+def test_journal_moves_cells(workbook_rw):
+    ws = workbook_rw['Sheet1']
+    tab = _people_table(ws)
+    people = list(tab.datasets)
+    cell = ws['C10']
+
+    journal = tab.track()
+    del journal[2]
+    journal.insert(10, people[0])
+
+    # Datasets 3-10 are moved up by one line, dataset 10 is new
+    with stats.collect() as st:
+        assert journal.commit() == 6
+
+    assert ws['C9'] is cell
+    assert st.counts['cells_written'] == 6
+    assert 'lines_inserted' not in st.counts
+
+
+@pytest.mark.parametrize('edit', [
+    lambda j, p: (j.append(p[0]), j.insert(1, p[3])),
+    lambda j, p: (j.append(p[0]), j.__setitem__(0, p[3])),
+])
+def test_journal_insert_inside_table(edit):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(['Date', 'ProductA', 'ProductB', 'Sum'])
+    for i in range(4):
+        ws.append([datetime(2020, 1, i + 1), i, i * 2.0, None])
+    # The row after the table is not empty, so new rows are inserted
+    # before the last line of the table
+    ws['F6'] = 'x'
+    ws['A7'] = 'Footer'
+
+    tab = table.Table(ws, position.MarkerPos('A1'), Prices, max_blanks=0)
+    tab.read_datasets()
+    prices = list(tab.datasets)
+
+    expected = list(prices)
+    edit(expected, prices)
+
+    journal = tab.track()
+    edit(journal, prices)
+    journal.commit()
+
+    assert ws['A%d' % (7 + len(expected) - 4)].value == 'Footer'
+    tab = table.Table(ws, position.MarkerPos('A1'), Prices, max_blanks=0)
+    tab.read_datasets()
+    assert tab.datasets == expected
+
+
+def test_journal_commit_failed():
+    ws = openpyxl.Workbook().active
+    ws.append(['Date', 'ProductA', 'ProductB', 'Sum'])
+    for i in range(4):
+        ws.append([datetime(2020, 1, i + 1), i, i * 2.0, None])
+    # No empty row to insert new rows
+    for row in range(1, 7):
+        ws.cell(row, 6, 'x')
+    ws['A7'] = 'Footer'
+
+    tab = table.Table(ws, position.MarkerPos('A1'), Prices, max_blanks=0)
+    tab.read_datasets()
+    values = [[c.value for c in row] for row in ws.iter_rows()]
+
+    journal = tab.track()
+    del journal[0]
+    journal.extend(journal[:2])
+    with pytest.raises(Exception, match='Could not insert'):
+        journal.commit()
+
+    assert [[c.value for c in row] for row in ws.iter_rows()] == values
+
+
+def test_journal_touch(workbook_rw):
+    ws = workbook_rw['Sheet1']
+    tab = _people_table(ws)
+
+    journal = tab.track()
+    journal[1].height = 1
+    assert not journal.changed
+
+    journal.touch(1)
+    assert journal.changed
+    assert journal.commit() == 1
+    assert journal.commit() == 0
+
+    assert _people_table(ws).datasets[1].height == 1
+
+
+def test_journal_not_in_sync(workbook_rw):
+    ws = workbook_rw['Sheet1']
+    tab = _people_table(ws)
+    people = list(tab.datasets)
+    tab.datasets.pop()
+
+    journal = tab.track()
+    journal.insert(0, people[-1])
+    journal.commit()
+
+    assert _people_table(ws).datasets == people[-1:] + people[:-1]
+
+
+@pytest.mark.parametrize('n_datasets', [17, 15])
+def test_write_datasets_resize_twice(workbook_rw, n_datasets):
+    ws = workbook_rw['Sheet1']
+    tab = table.Table(ws, position.MarkerName('table_people'), Person)
+    tab.read_datasets()
+    people = tab.datasets
+
+    tab.datasets = (people * 2)[:n_datasets]
+    tab.write_datasets()
+    assert tab.write_datasets() == 0
+
+    tab.datasets = people
+    tab.write_datasets()
+
+    assert ws.cell(24, 2).value == 'Date'
+    tab = table.Table(ws, position.MarkerName('table_people'), Person)
+    tab.read_datasets()
+    assert tab.datasets == people
+
+
+@pytest.mark.parametrize('n_datasets,footer_col,sum_end', [
+    (3, 7, 'D'),
+    (5, 9, 'D'),
+    (1, 5, 'B'),
+])
+def test_write_datasets_resize_horizontal(n_datasets, footer_col, sum_end):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    for row, values in enumerate([['Date', 1, 2, 3], ['ProductA', 4, 5, 6],
+                                  ['ProductB', 7, 8, 9], ['Sum', 0, 0, 0]],
+                                 1):
+        for col, val in enumerate(values, 1):
+            ws.cell(row, col, val)
+    ws['G1'] = 'Total'
+    ws['G2'] = '=SUM(B2:D2)'
+
+    tab = table.Table(ws, position.MarkerPos('A1'), Prices,
+                      position.Direction.DOWN, position.Direction.RIGHT)
+    tab.read_datasets()
+    prices = tab.datasets
+
+    tab.datasets = (prices * 2)[:n_datasets]
+    tab.write_datasets()
+
+    assert ws.cell(1, footer_col).value == 'Total'
+    assert ws.cell(2, footer_col).value == '=SUM(B2:%s2)' % sum_end
+
+    tab = table.Table(ws, position.MarkerPos('A1'), Prices,
+                      position.Direction.DOWN, position.Direction.RIGHT)
+    tab.read_datasets()
+    assert tab.datasets == (prices * 2)[:n_datasets]
+
+
+def test_write_datasets_moved_lines():
+    d1 = datetime(2020, 1, 2)
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    for row in [['Name', 'Start', 'End'], ['A', d1, None], ['B', d1, None],
+                ['C', d1, None], ['Next', None, None]]:
+        ws.append(row)
+
+    tab = table.Table(ws, position.MarkerPos('A1'), Event)
+    tab.read_datasets()
+    tab.datasets.insert(1, Event('X', d1, None))
+
+    # The last line is moved by the insertion and has to be rewritten
+    assert tab.write_datasets() == 1 + 1 + 3
+    assert [c.value for c in ws['A']] == ['Name', 'A', 'X', 'B', 'C', 'Next']
+
+
+@dataclass
+class Item:
+    name: str
+    count: int
+
+
+def test_sheet_reader_dashboard():
+    ws = openpyxl.Workbook().active
+    ws['A1'] = 'Name'
+    ws['B1'] = 'Count'
+    ws['D3'] = 'Count'
+    ws['E3'] = 'Name'
+    for i in range(5):
+        ws.cell(2 + i, 1, 'a%d' % i)
+        ws.cell(2 + i, 2, i)
+    for i in range(8):
+        ws.cell(4 + i, 4, i * 10)
+        ws.cell(4 + i, 5, 'd%d' % i)
+    ws['A20'] = 'Name'
+    ws['B20'] = 'Count'
+    ws['A21'] = 'x'
+
+    specs = [
+        (position.MarkerPos('D3'), Item),
+        (position.MarkerSearch('Name', position.Range.from_str('A2:B30')),
+         Item),
+        (position.MarkerPos('A1'), Item),
+    ]
+    tables = table.SheetReader(ws, specs).read()
+
+    assert [len(t.datasets) for t in tables] == [8, 1, 5]
+    assert tables[0].datasets[7] == Item('d7', 70)
+    assert tables[1].datasets == [Item('x', 0)]
+
+    for tab, (marker, cls) in zip(tables, specs):
+        ref = table.Table(ws, marker, cls)
+        ref.read_datasets()
+
+        assert tab.datasets == ref.datasets
+        assert tab.final_pos == ref.final_pos
+
+
+def test_sheet_reader(workbook_ro):
+    ws = workbook_ro['Sheet1']
+    tables = table.SheetReader(ws, [
+        (position.MarkerName('table_people'), Person),
+        (position.MarkerName('table_prices'), Prices,
+         dict(header_dir=position.Direction.DOWN,
+              body_dir=position.Direction.RIGHT)),
+    ]).read()
+
+    assert_obj_equals_json_file(tables[0].datasets,
+                                os.path.join(DIR_JSON, 'people.json'))
+    assert_obj_equals_json_file(tables[1].datasets,
+                                os.path.join(DIR_JSON, 'prices.json'))
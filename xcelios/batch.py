@@ -0,0 +1,230 @@
+import os
+import sys
+import traceback
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import (Any, Dict, Iterable, Iterator, List, Optional, Sequence,
+                    Type)
+
+import openpyxl
+
+from xcelios.position import MarkerAbs
+from xcelios.table import SheetReader, Table
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+
+@dataclass
+class TableSpec:
+    """
+    Table to read from every file.
+
+    Markers and dataset classes are sent to the worker processes, so they
+    have to be picklable (the dataset class has to be defined at the top
+    level of a module).
+
+    :param marker: Marker pointing to the table
+    :param obj_class: Dataset class
+    :param sheet: Worksheet title (default: active worksheet)
+    :param kwargs: Additional :class:`xcelios.table.Table` arguments
+    """
+    marker: MarkerAbs
+    obj_class: Type
+    sheet: Optional[str] = None
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class FileResult:
+    """
+    Tables read from a file.
+
+    :param path: File path
+    :param tables: One entry per :class:`TableSpec`: list of datasets or
+                   dict of column arrays (``columns=True``).
+                   Empty if reading the file failed.
+    :param error: Formatted exception if reading the file failed
+    """
+    path: str
+    tables: List[Any] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _read_sheet(ws, specs: List[TableSpec], columns: bool) -> List[Any]:
+    if columns:
+        return [
+            Table(ws, spec.marker, spec.obj_class,
+                  **spec.kwargs).read_columns() for spec in specs
+        ]
+
+    reader = SheetReader(ws, [(spec.marker, spec.obj_class, spec.kwargs)
+                              for spec in specs])
+    return [table.datasets for table in reader.read()]
+
+
+def read_file(path: str,
+              specs: Sequence[TableSpec],
+              columns: bool = False,
+              read_only: bool = True) -> FileResult:
+    """
+    Read the tables from a single file.
+
+    Errors are not raised but returned in the result.
+
+    :param path: File path
+    :param specs: Tables to read
+    :param columns: Read the tables as column arrays
+                    (see :meth:`xcelios.table.Table.read_columns`)
+    :param read_only: Open the workbook in read-only mode
+    :return: FileResult
+    """
+    path = os.fspath(path)
+
+    try:
+        wb = openpyxl.load_workbook(path, read_only=read_only)
+    except Exception:
+        return FileResult(path, error=traceback.format_exc())
+
+    try:
+        # Tables of the same worksheet are read together
+        by_sheet: Dict[Optional[str], List[int]] = dict()
+        for i, spec in enumerate(specs):
+            by_sheet.setdefault(spec.sheet, []).append(i)
+
+        tables: List[Any] = [None] * len(specs)
+        for sheet, idxs in by_sheet.items():
+            ws = wb.active if sheet is None else wb[sheet]
+            res = _read_sheet(ws, [specs[i] for i in idxs], columns)
+
+            for i, table in zip(idxs, res):
+                tables[i] = table
+
+        return FileResult(path, tables)
+    except Exception:
+        return FileResult(path, error=traceback.format_exc())
+    finally:
+        wb.close()
+
+
+def _init_worker(memory_limit: Optional[int]):
+    if memory_limit and resource is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+
+class _WorkerPool:
+    """
+    Process pool reading files with :func:`read_file`.
+
+    If a worker process dies, all files in the pool fail. The pool is
+    replaced and these files are read again one at a time in a separate
+    process, so only the file that crashed the worker gets an error result.
+
+    :param kwargs: ProcessPoolExecutor arguments
+    :param args: Additional :func:`read_file` arguments
+    """
+
+    def __init__(self, kwargs: Dict[str, Any], args: tuple):
+        self._kwargs = kwargs
+        self._args = args
+        self._executor = ProcessPoolExecutor(**kwargs)
+
+    def submit(self, path: str) -> Future:
+        try:
+            return self._executor.submit(read_file, path, *self._args)
+        except BrokenProcessPool:
+            self._executor.shutdown()
+            self._executor = ProcessPoolExecutor(**self._kwargs)
+            return self._executor.submit(read_file, path, *self._args)
+
+    def _read_alone(self, path: str) -> FileResult:
+        kwargs = dict(self._kwargs, max_workers=1)
+        kwargs.pop('max_tasks_per_child', None)
+
+        with ProcessPoolExecutor(**kwargs) as executor:
+            return executor.submit(read_file, path, *self._args).result()
+
+    def result(self, path: str, future: Future) -> FileResult:
+        try:
+            try:
+                return future.result()
+            except BrokenProcessPool:
+                # Any file in the pool may have crashed it
+                return self._read_alone(path)
+        except Exception:
+            # e.g. the worker process reading this file crashed
+            return FileResult(os.fspath(path), error=traceback.format_exc())
+
+    def shutdown(self):
+        self._executor.shutdown()
+
+
+def read_files(paths: Iterable[str],
+               specs: Sequence[TableSpec],
+               max_workers: Optional[int] = None,
+               memory_limit: Optional[int] = None,
+               max_tasks_per_child: Optional[int] = None,
+               columns: bool = False,
+               read_only: bool = True) -> Iterator[FileResult]:
+    """
+    Read the tables from many files in parallel using a process pool.
+
+    The results are returned in the order of the paths as soon as they
+    are available. Errors of single files (including running out of memory)
+    are returned in their results and do not stop the other files.
+    If a worker process crashes, the pool is replaced and the files that
+    were in the pool are read again one at a time.
+
+    Only a limited number of files is submitted ahead of the result
+    being consumed, so the results do not pile up in memory.
+
+    :param paths: File paths
+    :param specs: Tables to read from every file
+    :param max_workers: Number of worker processes (default: number of CPUs).
+                        0 reads the files in the current process.
+    :param memory_limit: Maximum memory per worker process in bytes
+                         (address space limit, only on Unix)
+    :param max_tasks_per_child: Replace worker processes after this number
+                                of files (Python 3.11+)
+    :param columns: Read the tables as column arrays
+                    (see :meth:`xcelios.table.Table.read_columns`)
+    :param read_only: Open the workbooks in read-only mode
+    :return: Iterator of FileResults
+    """
+    specs = list(specs)
+
+    if max_workers == 0:
+        for path in paths:
+            yield read_file(path, specs, columns, read_only)
+        return
+
+    kwargs = dict(max_workers=max_workers,
+                  initializer=_init_worker,
+                  initargs=(memory_limit, ))
+    if max_tasks_per_child and sys.version_info >= (3, 11):
+        kwargs['max_tasks_per_child'] = max_tasks_per_child
+
+    # Number of files submitted ahead of the consumer
+    window = 2 * (max_workers or os.cpu_count() or 1)
+    pending: deque = deque()
+    pool = _WorkerPool(kwargs, (specs, columns, read_only))
+
+    try:
+        for path in paths:
+            pending.append((path, pool.submit(path)))
+
+            if len(pending) >= window:
+                yield pool.result(*pending.popleft())
+
+        while pending:
+            yield pool.result(*pending.popleft())
+    finally:
+        pool.shutdown()
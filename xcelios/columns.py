@@ -0,0 +1,53 @@
+from datetime import date, datetime
+from typing import Any, Sequence, Type
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+# Types stored as masked arrays: (dtype, value of masked entries)
+_MASKED_TYPES = {
+    int: ('int64', 0),
+    float: ('float64', float('nan')),
+    bool: ('bool', False),
+}
+
+_DATETIME_TYPES = {
+    datetime: 'datetime64[us]',
+    date: 'datetime64[D]',
+}
+
+
+def to_array(values: Sequence[Any], raw_values: Sequence[Any], typ: Type):
+    """
+    Convert a table column into a NumPy array.
+
+    - int, float, bool: masked array. Blank cells and values that could not
+      be cast are masked.
+    - datetime, date: datetime64 array, blank cells are ``NaT``
+    - Other types: object array
+
+    :param values: Values cast to the column type
+    :param raw_values: Raw cell values (None for blank cells)
+    :param typ: Column type
+    :return: NumPy array
+    """
+    if numpy is None:
+        raise ImportError('NumPy is required for reading table columns')
+
+    if typ in _MASKED_TYPES:
+        dtype, fill = _MASKED_TYPES[typ]
+        mask = [v is None or r is None for v, r in zip(values, raw_values)]
+        data = [fill if m else v for v, m in zip(values, mask)]
+
+        return numpy.ma.MaskedArray(numpy.array(data, dtype=dtype),
+                                    mask=mask)
+
+    if typ in _DATETIME_TYPES:
+        return numpy.array(values, dtype=_DATETIME_TYPES[typ])
+
+    # Assign element-wise to prevent NumPy from creating nested arrays
+    arr = numpy.empty(len(values), dtype=object)
+    arr[:] = values
+    return arr
@@ -0,0 +1,289 @@
+import dataclasses
+import typing
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Type, Union
+
+from openpyxl.utils.datetime import CALENDAR_WINDOWS_1900
+
+from xcelios.dates import DateParser
+
+Converter = Callable[[Any], Any]
+
+# Custom converters registered by the user
+_converters: Dict[Any, Converter] = dict()
+
+# Row decoders cached per dataset class
+_decoders: Dict[Type, 'RowDecoder'] = dict()
+
+
+def register_converter(typ: Any, converter: Converter):
+    """
+    Register a function that converts raw cell values into the given type.
+
+    The converter is called with the raw cell value, which is None for
+    blank cells. It takes precedence over the built-in conversion rules.
+
+    :param typ: Type (as used in the dataclass annotations)
+    :param converter: Conversion function
+    """
+    _converters[typ] = converter
+    _decoders.clear()
+
+
+def unregister_converter(typ: Any):
+    """
+    Remove a converter added with :func:`register_converter`.
+
+    :param typ: Type
+    """
+    _converters.pop(typ, None)
+    _decoders.clear()
+
+
+def _is_union(typ: Any) -> bool:
+    return getattr(typ, '__origin__', None) is Union
+
+
+def resolve_type(typ: Any) -> Any:
+    """
+    Get the type that cell values of a field are converted to.
+    ``Optional[X]`` and ``Union[X, ...]`` resolve to ``X``.
+
+    :param typ: Type annotation
+    :return: Type
+    """
+    if _is_union(typ):
+        args = [a for a in typ.__args__ if a is not type(None)]  # noqa: E721
+        return resolve_type(args[0])
+    return typ
+
+
+def _conv_str(val: Any) -> str:
+    if val.__class__ is str:
+        return val
+    if val is None:
+        return ''
+    return str(val)
+
+
+def _conv_int(val: Any) -> int:
+    if val.__class__ is int:
+        return val
+    if val is None:
+        return 0
+    try:
+        return int(val)
+    except TypeError:
+        return None
+
+
+def _conv_datetime(val: Any) -> Optional[datetime]:
+    # Shared converters must not remember a detected date format,
+    # format detection per column is done by RowDecoder.get_converters
+    return DateParser().parse(val)
+
+
+def _conv_date(val: Any) -> Optional[date]:
+    return DateParser(as_date=True).parse(val)
+
+
+_BUILTIN_CONVERTERS: Dict[Any, Converter] = {
+    str: _conv_str,
+    int: _conv_int,
+    datetime: _conv_datetime,
+    date: _conv_date,
+}
+
+
+def _make_generic(typ: Type) -> Converter:
+    def conv(val: Any) -> Any:
+        try:
+            return typ(val)
+        except TypeError:
+            return None
+
+    return conv
+
+
+def _make_union(types: Sequence[Any], optional: bool) -> Converter:
+    converters = [get_converter(t) for t in types]
+    main = converters[0]
+    classes = tuple(t for t in types if isinstance(t, type))
+
+    def conv(val: Any) -> Any:
+        if val is None and optional:
+            return None
+        # Keep values that already have one of the member types
+        if isinstance(val, classes):
+            return val
+        return main(val)
+
+    return conv
+
+
+def get_converter(typ: Any) -> Converter:
+    """
+    Get the function converting raw cell values into the given type.
+
+    - Registered converters (see :func:`register_converter`) are used first
+    - ``str``: blank cells become ``''``
+    - ``int``: blank cells become ``0``
+    - ``datetime``, ``date``: datetime values are kept, strings and Excel
+      serial numbers are parsed (see :class:`xcelios.dates.DateParser`),
+      everything else becomes None. Every value is parsed on its own,
+      no date format is remembered between calls.
+    - ``Optional[X]``: blank cells stay None, other values are converted to X
+    - ``Union[X, Y]``: values of type X or Y are kept, others are
+      converted to X
+    - Other types are called with the value. If that raises a TypeError,
+      the result is None.
+
+    :param typ: Type annotation
+    :return: Conversion function
+    """
+    if typ in _converters:
+        return _converters[typ]
+    if typ in _BUILTIN_CONVERTERS:
+        return _BUILTIN_CONVERTERS[typ]
+
+    if _is_union(typ):
+        args = [a for a in typ.__args__ if a is not type(None)]  # noqa: E721
+        optional = len(args) != len(typ.__args__)
+
+        if len(args) == 1 and not optional:
+            return get_converter(args[0])
+        return _make_union(args, optional)
+
+    return _make_generic(typ)
+
+
+def _get_date_type(typ: Any) -> Optional[Type]:
+    # Date fields (including Optional) without a custom converter
+    if typ in _converters:
+        return None
+    if _is_union(typ):
+        args = [a for a in typ.__args__ if a is not type(None)]  # noqa: E721
+        if len(args) != 1:
+            return None
+        return _get_date_type(args[0])
+    if typ in (datetime, date):
+        return typ
+    return None
+
+
+def _get_type_hints(obj_class: Type) -> Dict[str, Any]:
+    try:
+        return typing.get_type_hints(obj_class)
+    except (NameError, TypeError):
+        # Fall back to the raw annotations if forward references
+        # cannot be resolved
+        return dict(obj_class.__annotations__)
+
+
+class RowDecoder:
+    """
+    Converts the raw cell values of a table line into a dataset object.
+
+    The converters for all fields of the dataset class are determined
+    once. Use :func:`get_decoder` to get the cached decoder of a class.
+    """
+
+    def __init__(self, obj_class: Type):
+        self.obj_class = obj_class
+
+        hints = _get_type_hints(obj_class)
+        self.types: Dict[str, Any] = {
+            key: hints.get(key, typ)
+            for key, typ in obj_class.__annotations__.items()
+        }
+        self.converters: Dict[str, Converter] = {
+            key: get_converter(typ)
+            for key, typ in self.types.items()
+        }
+        self.date_types: Dict[str, Type] = {
+            key: _get_date_type(typ)
+            for key, typ in self.types.items() if _get_date_type(typ)
+        }
+
+        # Positional order of the dataclass constructor
+        if dataclasses.is_dataclass(obj_class):
+            self._init_fields = [
+                f.name for f in dataclasses.fields(obj_class) if f.init
+            ]
+        else:
+            self._init_fields = None
+
+    def get_converters(
+            self,
+            keys: Sequence[str],
+            date_formats: Optional[Sequence[str]] = None,
+            epoch: datetime = CALENDAR_WINDOWS_1900) -> List[Converter]:
+        """
+        Get the converters for a sequence of field names.
+
+        Date fields get a new :class:`xcelios.dates.DateParser` each,
+        so the date format is detected per column.
+
+        :param keys: Field names
+        :param date_formats: Formats for parsing date strings
+        :param epoch: Excel epoch of the workbook
+        :return: List of converters
+        """
+        return [
+            DateParser(date_formats, self.date_types[key] is date, epoch)
+            if key in self.date_types else self.converters[key]
+            for key in keys
+        ]
+
+    def make_decode(
+            self,
+            keys: Sequence[str],
+            date_formats: Optional[Sequence[str]] = None,
+            epoch: datetime = CALENDAR_WINDOWS_1900
+    ) -> Callable[[Sequence], Any]:
+        """
+        Create a function converting the raw values of a table line
+        into a dataset object.
+
+        :param keys: Field names in the order of the raw values
+        :param date_formats: Formats for parsing date strings
+        :param epoch: Excel epoch of the workbook
+        :return: Decode function: decode(raw_values) -> dataset
+        """
+        keys = list(keys)
+        converters = self.get_converters(keys, date_formats, epoch)
+        cls = self.obj_class
+
+        if self._init_fields is not None and \
+                sorted(keys) == sorted(self._init_fields):
+            # Reorder the values to call the constructor with
+            # positional arguments
+            idx = [keys.index(f) for f in self._init_fields]
+            pairs = [(converters[i], i) for i in idx]
+
+            def decode(raw_vals: Sequence) -> Any:
+                return cls(*[c(raw_vals[i]) for c, i in pairs])
+        else:
+
+            def decode(raw_vals: Sequence) -> Any:
+                return cls(
+                    **{
+                        k: c(v)
+                        for k, c, v in zip(keys, converters, raw_vals)
+                    })
+
+        return decode
+
+
+def get_decoder(obj_class: Type) -> RowDecoder:
+    """
+    Get the cached row decoder of a dataset class.
+
+    :param obj_class: Dataset class
+    :return: RowDecoder
+    """
+    decoder = _decoders.get(obj_class)
+    if decoder is None:
+        decoder = RowDecoder(obj_class)
+        _decoders[obj_class] = decoder
+    return decoder
@@ -0,0 +1,148 @@
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence
+
+from openpyxl.utils.datetime import CALENDAR_WINDOWS_1900, from_excel
+
+# Formats tried when parsing date strings, in this order
+DEFAULT_DATE_FORMATS = (
+    '%Y-%m-%d',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%dT%H:%M:%S',
+    '%d.%m.%Y',
+    '%d.%m.%Y %H:%M:%S',
+    '%d.%m.%Y %H:%M',
+    '%d.%m.%y',
+    '%m/%d/%Y',
+    '%d/%m/%Y',
+    '%m/%d/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M:%S',
+    '%Y/%m/%d',
+    '%d %b %Y',
+    '%d %B %Y',
+    '%b %d, %Y',
+    '%B %d, %Y',
+)
+
+
+class DateParser:
+    """
+    Converts cell values of a date column into datetime objects.
+
+    - datetime values are kept, date values get a time of 00:00
+    - Numbers are treated as Excel serial dates
+    - Strings are parsed using the given formats. The format of the first
+      string that can be parsed is used first for all following strings.
+      Only if it does not fit, the other formats are tried again.
+    - All other values become None
+
+    :param formats: Date formats (``strptime`` syntax).
+                    Default: :data:`DEFAULT_DATE_FORMATS`
+    :param as_date: Return date objects instead of datetimes
+    :param epoch: Excel epoch of the workbook (``wb.epoch``)
+    """
+
+    def __init__(self,
+                 formats: Optional[Sequence[str]] = None,
+                 as_date: bool = False,
+                 epoch: datetime = CALENDAR_WINDOWS_1900):
+        self.formats = tuple(formats or DEFAULT_DATE_FORMATS)
+        self.as_date = as_date
+        self.epoch = epoch
+
+        # Detected format of the column
+        self.format: Optional[str] = None
+
+    def _parse_str(self, val: str) -> Optional[datetime]:
+        val = val.strip()
+
+        if self.format is not None:
+            try:
+                return datetime.strptime(val, self.format)
+            except ValueError:
+                pass
+
+        for fmt in self.formats:
+            try:
+                res = datetime.strptime(val, fmt)
+            except ValueError:
+                continue
+
+            self.format = fmt
+            return res
+
+        return None
+
+    def _parse_serial(self, val: float) -> Optional[datetime]:
+        try:
+            res = from_excel(val, self.epoch)
+        except (ValueError, OverflowError):
+            return None
+
+        # Serials < 1 are times without a date
+        if not isinstance(res, datetime):
+            return None
+        return res
+
+    def _parse_dt(self, val: Any) -> Optional[datetime]:
+        if isinstance(val, datetime):
+            return val
+        if isinstance(val, date):
+            return datetime(val.year, val.month, val.day)
+        if isinstance(val, str):
+            return self._parse_str(val)
+        if isinstance(val, (int, float)) and not isinstance(val, bool):
+            return self._parse_serial(val)
+        return None
+
+    def parse(self, val: Any) -> Any:
+        """
+        Convert a single cell value.
+
+        :param val: Cell value
+        :return: datetime (date if ``as_date`` is set) or None
+        """
+        res = self._parse_dt(val)
+
+        if self.as_date and res is not None:
+            return res.date()
+        return res
+
+    __call__ = parse
+
+    def parse_column(self, values: Sequence[Any]) -> List[Any]:
+        """
+        Convert all values of a column in one pass.
+
+        Every distinct string is parsed only once.
+
+        :param values: Cell values
+        :return: List of datetimes (dates if ``as_date`` is set) or None
+        """
+        parsed = dict()
+        res = []
+
+        for val in values:
+            if val.__class__ is str:
+                if val not in parsed:
+                    parsed[val] = self.parse(val)
+                res.append(parsed[val])
+            else:
+                res.append(self.parse(val))
+
+        return res
+
+
+def parse_date(val: Any, formats: Optional[Sequence[str]] = None) -> Any:
+    """
+    Convert a cell value into a datetime object.
+
+    See :class:`DateParser` for the conversion rules. If you have to
+    convert many values of the same kind, use a DateParser instance
+    instead of this function.
+
+    :param val: Cell value
+    :param formats: Date formats (``strptime`` syntax)
+    :return: datetime or None
+    """
+    return DateParser(formats).parse(val)
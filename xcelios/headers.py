@@ -0,0 +1,99 @@
+import dataclasses
+from typing import Any, Dict, Iterable, List, Optional, Set, Type
+
+# Characters ignored when comparing header names
+_SEPARATORS = str.maketrans('', '', '_- ')
+
+# Header matchers cached per dataset class
+_matchers: Dict[Type, 'HeaderMatcher'] = dict()
+
+
+def normalize_header(name: Any) -> str:
+    """
+    Normalize a header name for matching: the name is lowercased and
+    underscores, dashes and spaces are removed.
+
+    :param name: Header name or cell value
+    :return: Normalized name
+    """
+    return str(name).lower().translate(_SEPARATORS)
+
+
+class HeaderMatcher:
+    """
+    Matches the header cells of a table to the fields of a dataset class.
+
+    A header cell matches a field if its normalized name
+    (see :func:`normalize_header`) starts with the normalized field name
+    or one of its aliases. Aliases are declared in the dataclass field
+    metadata::
+
+        email: str = field(metadata={'aliases': ['Mail', 'E-Mail address']})
+
+    A single alias can also be given as a string.
+
+    If multiple fields match a header cell, the first one in the order of
+    the dataclass annotations is chosen.
+
+    Use :func:`get_matcher` to get the cached matcher of a class.
+    """
+
+    def __init__(self, obj_class: Type):
+        self.keys: List[str] = list(obj_class.__annotations__.keys())
+
+        aliases: Dict[str, Iterable[str]] = dict()
+        if dataclasses.is_dataclass(obj_class):
+            for f in dataclasses.fields(obj_class):
+                names = f.metadata.get('aliases', ())
+                # A single alias may be given as a string
+                if isinstance(names, str):
+                    names = (names, )
+                aliases[f.name] = names
+
+        # Normalized name -> indices of the matching fields
+        self._names: Dict[str, List[int]] = dict()
+        for i, key in enumerate(self.keys):
+            for name in (key, *aliases.get(key, ())):
+                norm = normalize_header(name)
+                if not norm:
+                    continue
+                idxs = self._names.setdefault(norm, [])
+                if i not in idxs:
+                    idxs.append(i)
+
+        self._max_len = max(map(len, self._names), default=0)
+
+    def match(self, value: Any,
+              remaining: Optional[Set[str]] = None) -> Optional[str]:
+        """
+        Get the field matching a header cell.
+
+        :param value: Cell value
+        :param remaining: Only match these fields (default: all fields)
+        :return: Field name or None
+        """
+        norm = normalize_header(value)
+        best = None
+
+        # Look up all prefixes of the header name
+        for n in range(1, min(len(norm), self._max_len) + 1):
+            for i in self._names.get(norm[:n], ()):
+                if (best is None or i < best) and \
+                        (remaining is None or self.keys[i] in remaining):
+                    best = i
+
+        return None if best is None else self.keys[best]
+
+
+def get_matcher(obj_class: Type) -> HeaderMatcher:
+    """
+    Get the cached header matcher of a dataset class.
+
+    :param obj_class: Dataset class
+    :return: HeaderMatcher
+    """
+    matcher = _matchers.get(obj_class)
+    if matcher is None:
+        matcher = HeaderMatcher(obj_class)
+        _matchers[obj_class] = matcher
+    return matcher
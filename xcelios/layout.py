@@ -0,0 +1,258 @@
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Type
+
+from openpyxl.worksheet.worksheet import Worksheet
+
+from xcelios.position import (Direction, MarkerAbs, MarkerName, MarkerPattern,
+                              MarkerPos, MarkerSearch, Position, Range)
+from xcelios.refs import _iter_defined_names
+from xcelios.sheet import iter_line_values
+
+
+def _marker_key(marker: MarkerAbs) -> Optional[list]:
+    """:return: JSON-serializable description of a marker or None
+    if the marker type is not supported"""
+    if isinstance(marker, MarkerPos):
+        return ['pos', str(marker.pos)]
+    if isinstance(marker, MarkerName):
+        return ['name', marker.name]
+    if isinstance(marker, MarkerPattern):
+        initial = _marker_key(marker.initial_marker)
+        if initial is None:
+            return None
+        return [
+            'pattern', initial, marker.rex.pattern, marker.rex.flags,
+            marker.direction.name, marker.max_range
+        ]
+    if isinstance(marker, MarkerSearch):
+        return [
+            'search', marker.rex.pattern, marker.rex.flags,
+            str(marker.search_range or '')
+        ]
+    return None
+
+
+def _read_values(ws: Worksheet, positions: Sequence[Position]) -> List[str]:
+    # The header cells are in a single row or column,
+    # so they are read as one line
+    if len({p.row for p in positions}) == 1:
+        lines = [(range(positions[0].row, positions[0].row + 1),
+                  [p.col for p in positions], True)]
+    elif len({p.col for p in positions}) == 1:
+        lines = [(range(positions[0].col, positions[0].col + 1),
+                  [p.row for p in positions], False)]
+    else:
+        lines = [(range(p.row, p.row + 1), [p.col], True) for p in positions]
+
+    return [
+        str(v) for line, fixed, by_row in lines
+        for values in iter_line_values(ws, line, fixed, by_row)
+        for v in values
+    ]
+
+
+def template_fingerprint(ws: Worksheet) -> str:
+    """
+    Get a fingerprint of a worksheet template, consisting of the worksheet
+    title and the defined names of the workbook.
+
+    :param ws: OpenPyXL worksheet
+    :return: Hex digest
+    """
+    names = sorted((sheet or '', dn.name, str(dn.attr_text))
+                   for dn, sheet in _iter_defined_names(ws.parent))
+
+    return hashlib.sha1(json.dumps([ws.title, names]).encode()).hexdigest()
+
+
+@dataclass
+class Layout:
+    """
+    Resolved position and headers of a table.
+
+    :param initial_pos: Position of the initial marker
+    :param title_positions: Positions of the header cells by field name
+    :param title_range: Range of the header cells
+    :param values: Values (as strings) of the cell at the initial position
+                   and of the header cells, used to check if the layout
+                   matches a worksheet
+    """
+    initial_pos: Position
+    title_positions: Dict[str, Position]
+    title_range: Range
+    values: List[str]
+
+    def _positions(self) -> List[Position]:
+        return [self.initial_pos, *self.title_positions.values()]
+
+    @classmethod
+    def of(cls, ws: Worksheet, initial_pos: Position,
+           title_positions: Dict[str, Position],
+           title_range: Range) -> 'Layout':
+        """
+        Create the layout of a table located in a worksheet.
+
+        :param ws: OpenPyXL worksheet
+        :param initial_pos: Position of the initial marker
+        :param title_positions: Positions of the header cells
+        :param title_range: Range of the header cells
+        :return: Layout
+        """
+        layout = cls(initial_pos, dict(title_positions), title_range, [])
+        layout.values = _read_values(ws, layout._positions())
+        return layout
+
+    def matches(self, ws: Worksheet) -> bool:
+        """
+        Check if the initial cell and the header cells of the worksheet
+        still have the values stored in the layout.
+
+        :param ws: OpenPyXL worksheet
+        :return: True if the layout can be used for the worksheet
+        """
+        return _read_values(ws, self._positions()) == self.values
+
+    def to_json(self) -> dict:
+        rg = self.title_range
+        return {
+            'initial_pos': str(self.initial_pos),
+            'title_positions':
+            {k: str(p)
+             for k, p in self.title_positions.items()},
+            'title_range': [rg.min_row, rg.max_row, rg.min_col, rg.max_col],
+            'values': self.values,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> 'Layout':
+        return cls(
+            Position(data['initial_pos']),
+            {k: Position(p)
+             for k, p in data['title_positions'].items()},
+            Range(*data['title_range']), list(data['values']))
+
+
+class LayoutCache:
+    """
+    Cache of table layouts (initial position and header positions),
+    so tables in worksheets created from the same template are set up
+    without resolving their markers and searching their headers.
+
+    Layouts are stored in memory (evicting the least recently used ones)
+    and optionally as JSON files in a directory, so they can be reused
+    between runs and by multiple processes.
+
+    The cache key consists of the table parameters and the template
+    fingerprint (see :func:`template_fingerprint`). A cached layout is only
+    used if the initial cell and the header cells still have the same
+    values.
+
+    :param maxsize: Maximum number of layouts kept in memory
+    :param path: Directory for storing the layouts on disk
+    """
+
+    def __init__(self, maxsize: int = 128, path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.path = None if path is None else os.fspath(path)
+        self._layouts: 'OrderedDict[str, Layout]' = OrderedDict()
+
+    def key(self, ws: Worksheet, marker: MarkerAbs, obj_class: Type,
+            header_dir: Direction, body_dir: Direction,
+            max_blanks: int) -> Optional[str]:
+        """
+        Get the cache key of a table.
+
+        :param ws: OpenPyXL worksheet
+        :param marker: Initial marker
+        :param obj_class: Dataset class
+        :param header_dir: Header direction
+        :param body_dir: Body direction
+        :param max_blanks: Maximum number of blank cells
+        :return: Key or None if the table cannot be cached
+                 (unsupported marker type)
+        """
+        marker_key = _marker_key(marker)
+        if marker_key is None:
+            return None
+
+        data = [
+            template_fingerprint(ws), marker_key,
+            '%s.%s' % (obj_class.__module__, obj_class.__qualname__),
+            list(obj_class.__annotations__), header_dir.name, body_dir.name,
+            max_blanks
+        ]
+        return hashlib.sha1(json.dumps(data).encode()).hexdigest()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, key + '.json')
+
+    def _load(self, key: str) -> Optional[Layout]:
+        try:
+            with open(self._file(key), encoding='utf-8') as f:
+                return Layout.from_json(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _store(self, key: str, layout: Layout):
+        # Storing is best-effort like loading: if the directory is not
+        # writable, the layout is only kept in memory
+        tmp = None
+        try:
+            os.makedirs(self.path, exist_ok=True)
+
+            # Write to a temporary file first, so other processes
+            # never read incomplete files
+            fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(layout.to_json(), f)
+            os.replace(tmp, self._file(key))
+        except OSError:
+            if tmp is not None and os.path.exists(tmp):
+                os.remove(tmp)
+
+    def _remember(self, key: str, layout: Layout):
+        self._layouts[key] = layout
+        self._layouts.move_to_end(key)
+        while len(self._layouts) > self.maxsize:
+            self._layouts.popitem(last=False)
+
+    def get(self, key: str, ws: Worksheet) -> Optional[Layout]:
+        """
+        Get the cached layout of a table if it matches the worksheet.
+
+        :param key: Cache key (see :meth:`key`)
+        :param ws: OpenPyXL worksheet
+        :return: Layout or None
+        """
+        layout = self._layouts.get(key)
+        if layout is None and self.path is not None:
+            layout = self._load(key)
+
+        if layout is None or not layout.matches(ws):
+            return None
+
+        self._remember(key, layout)
+        return layout
+
+    def put(self, key: str, layout: Layout):
+        """
+        Store the layout of a table.
+
+        :param key: Cache key (see :meth:`key`)
+        :param layout: Layout
+        """
+        self._remember(key, layout)
+        if self.path is not None:
+            self._store(key, layout)
+
+    def clear(self):
+        """Remove all layouts from memory (files on disk are kept)"""
+        self._layouts.clear()
+
+    def __len__(self) -> int:
+        return len(self._layouts)
@@ -1,17 +1,28 @@
+import itertools
 import re
 from enum import Enum, auto
-from typing import Tuple, Union
+from typing import (Any, Dict, Hashable, Iterable, Iterator, List, Mapping,
+                    Optional, Tuple, Union)
 
 from openpyxl.cell import Cell
+from openpyxl.comments import Comment
 from openpyxl.utils import column_index_from_string, get_column_letter
 from openpyxl.worksheet.worksheet import Worksheet
 
+from xcelios.refs import NameArea, NameIndex
+from xcelios.sheet import (SheetBounds, ValueIndex, is_cell_occupied,
+                           iter_cells, iter_line_values, peek_cell)
+from xcelios.stats import timed
+
 MAX_ROWS = 1048576
 MAX_COLS = 16384
 
 _POSITION_RE = re.compile(r'([^!]+)!\$([A-Z]+)\$(\d+)')
 _COORD_RE = re.compile(r'([A-Z]+)(\d+)')
 _RANGE_RE = re.compile(r'([A-Z\d]+):([A-Z\d]+)')
+_BACKREF_RE = re.compile(r'\\\d|\(\?P=|\(\?\(\d')
+_SCOPED_FLAGS = ((re.IGNORECASE, 'i'), (re.MULTILINE, 'm'), (re.DOTALL, 's'),
+                 (re.VERBOSE, 'x'))
 
 
 def _check_col_value(val: int):
@@ -25,15 +36,17 @@ def _check_row_value(val: int):
 
 
 def get_ws_min_coord(ws: Worksheet, axis: 'Axis') -> int:
+    bounds = SheetBounds.of(ws)
     if axis == axis.COL:
-        return ws.min_column
-    return ws.min_row
+        return bounds.min_col
+    return bounds.min_row
 
 
 def get_ws_max_coord(ws: Worksheet, axis: 'Axis') -> int:
+    bounds = SheetBounds.of(ws)
     if axis == axis.COL:
-        return ws.max_column
-    return ws.max_row
+        return bounds.max_col
+    return bounds.max_row
 
 
 class InvalidPositionError(Exception):
@@ -55,13 +68,11 @@ class Direction(Enum):
     DOWN = (0, 1)
     LEFT = (-1, 0)
 
-    @property
-    def d_col(self) -> int:
-        return self.value[0]
-
-    @property
-    def d_row(self) -> int:
-        return self.value[1]
+    def __init__(self, d_col: int, d_row: int):
+        # Plain attributes are considerably faster to access than
+        # properties reading the enum value
+        self.d_col = d_col
+        self.d_row = d_row
 
     @property
     def axis(self) -> Axis:
@@ -78,6 +89,14 @@ class Direction(Enum):
 
 
 class Position:
+    """
+    Immutable cell position.
+
+    Positions are hashable, so they can be used as dict keys
+    or set members.
+    """
+    __slots__ = ('col', 'row')
+
     def __init__(self, *args):
         """
         Example: ``Position(2, 4)`` or ``Position('B4')``
@@ -85,8 +104,8 @@ class Position:
         :param args: col: [int, str], row: [int, str] OR pos: str
         """
         if len(args) == 2:
-            self.col = Position._parse_colval(args[0])
-            self.row = Position._parse_rowval(args[1])
+            col = Position._parse_colval(args[0])
+            row = Position._parse_rowval(args[1])
         elif len(args) == 1:
             m = _COORD_RE.match(args[0])
 
@@ -94,11 +113,29 @@ class Position:
                 raise InvalidPositionError('Invalid coord string: %s' %
                                            args[0])
 
-            self.col = Position._parse_colval(m[1])
-            self.row = Position._parse_rowval(m[2])
+            col = Position._parse_colval(m[1])
+            row = Position._parse_rowval(m[2])
         else:
             raise TypeError('Position requires 1-2 positional arguments')
 
+        _set_col(self, col)
+        _set_row(self, row)
+
+    @classmethod
+    def _make(cls, col: int, row: int) -> 'Position':
+        """
+        Create a position from coordinates that are known to be valid,
+        skipping parsing and validation.
+
+        :param col: Column index
+        :param row: Row index
+        :return: New position
+        """
+        pos = _new(cls)
+        _set_col(pos, col)
+        _set_row(pos, row)
+        return pos
+
     @staticmethod
     def _parse_colval(val: Union[int, str]) -> int:
         if not isinstance(val, int):
@@ -148,10 +185,12 @@ class Position:
         :param d: Distance in cells
         :return: New position
         """
-        ncol = self.col + direction.value[0] * d
-        nrow = self.row + direction.value[1] * d
+        ncol = self.col + direction.d_col * d
+        nrow = self.row + direction.d_row * d
 
-        return Position(ncol, nrow)
+        _check_col_value(ncol)
+        _check_row_value(nrow)
+        return Position._make(ncol, nrow)
 
     def dir_distance(self, pos_b: 'Position', direction: Direction):
         """
@@ -180,24 +219,25 @@ class Position:
         :return: New position
         """
         if isinstance(pos_b, int):
-            pos_b_data = (pos_b, pos_b)
-        else:
-            pos_b_data = (pos_b.row, pos_b.col)
+            if axis == Axis.ROW:
+                return Position._make(Position._parse_colval(pos_b), self.row)
+            return Position._make(self.col, Position._parse_rowval(pos_b))
 
         if axis == Axis.ROW:
-            return Position(pos_b_data[1], self.row)
-        return Position(self.col, pos_b_data[0])
+            return Position._make(pos_b.col, self.row)
+        return Position._make(self.col, pos_b.row)
 
     def is_in(self, ws: Worksheet) -> bool:
         """
         Check if the position is within the data containing area of
         a worksheet.
 
+        Uses the shared :class:`SheetBounds` snapshot of the worksheet.
+
         :param ws: OpenPyXL Worksheet
         :return: is_in
         """
-        return ws.min_row <= self.row <= ws.max_row and \
-            ws.min_column <= self.col <= ws.max_column
+        return self in SheetBounds.of(ws)
 
     def get_cell(self, ws: Worksheet) -> Cell:
         """
@@ -208,6 +248,51 @@ class Position:
         """
         return ws.cell(self.row, self.col)
 
+    def peek_cell(self, ws: Worksheet) -> Optional[Cell]:
+        """
+        Get the cell of a worksheet located at the position without
+        creating it (unlike :meth:`get_cell`).
+
+        :param ws: OpenPyXL Worksheet or ReadOnlyWorksheet
+        :return: OpenPyXL Cell or None if the cell does not exist
+        """
+        return peek_cell(ws, self.row, self.col)
+
+    def peek_value(self, ws: Worksheet) -> Any:
+        """
+        Get the value of the cell located at the position without
+        creating the cell.
+
+        :param ws: OpenPyXL Worksheet or ReadOnlyWorksheet
+        :return: Cell value or None
+        """
+        cell = self.peek_cell(ws)
+        return None if cell is None else cell.value
+
+    def peek_comment(self, ws: Worksheet) -> Optional[Comment]:
+        """
+        Get the comment of the cell located at the position without
+        creating the cell.
+
+        :param ws: OpenPyXL Worksheet or ReadOnlyWorksheet
+        :return: Comment or None
+        """
+        return getattr(self.peek_cell(ws), 'comment', None)
+
+    def peek_style(self, ws: Worksheet) -> Optional[str]:
+        """
+        Get the name of the cell style of the cell located at the position
+        without creating the cell.
+
+        :param ws: OpenPyXL Worksheet or ReadOnlyWorksheet
+        :return: Style name or None if the cell has no style
+        """
+        cell = self.peek_cell(ws)
+        if cell is None or not cell.has_style:
+            return None
+        # Cells of read-only worksheets have no named styles
+        return getattr(cell, 'style', None)
+
     def is_cell_empty(self, ws: Worksheet) -> bool:
         """
         Check if the cell at this position in the given worksheet
@@ -216,9 +301,8 @@ class Position:
         :param ws: OpenPyXL Worksheet
         :return: is_empty
         """
-        cell = self.get_cell(ws)
-        return cell.value is None and cell.comment is None and \
-            not cell.has_style
+        cell = self.peek_cell(ws)
+        return cell is None or not is_cell_occupied(cell)
 
     def get_coord(self, axis: Axis) -> int:
         """
@@ -231,9 +315,23 @@ class Position:
             return self.col
         return self.row
 
+    def __setattr__(self, key, value):
+        raise AttributeError('Position objects are immutable')
+
+    def __delattr__(self, key):
+        raise AttributeError('Position objects are immutable')
+
     def __eq__(self, other):
+        if not isinstance(other, Position):
+            return NotImplemented
         return self.row == other.row and self.col == other.col
 
+    def __hash__(self):
+        return hash((self.col, self.row))
+
+    def __reduce__(self):
+        return Position, (self.col, self.row)
+
     def __str__(self):
         return get_column_letter(self.col) + str(self.row)
 
@@ -241,6 +339,11 @@ class Position:
         return '<Position: %s>' % str(self)
 
 
+_new = object.__new__
+_set_col = Position.col.__set__
+_set_row = Position.row.__set__
+
+
 class Range:
     def __init__(self, min_row: int, max_row: int, min_col: int, max_col: int):
         self.min_row = min_row
@@ -318,6 +421,30 @@ class Range:
         cp._verify()
         return cp
 
+    def peek_values(self, ws: Worksheet) -> List[tuple]:
+        """
+        Get the values of the cells in the range without creating cells.
+
+        :param ws: OpenPyXL Worksheet or ReadOnlyWorksheet
+        :return: List of value tuples, one per row
+        """
+        return list(
+            iter_line_values(ws, range(self.min_row, self.max_row + 1),
+                             range(self.min_col, self.max_col + 1)))
+
+    def peek_cells(self, ws: Worksheet) -> Dict[Position, Cell]:
+        """
+        Get the existing cells in the range without creating cells.
+
+        :param ws: OpenPyXL Worksheet or ReadOnlyWorksheet
+        :return: Dict of position -> cell in row-major order
+        """
+        return {
+            Position._make(c.column, c.row): c
+            for c in iter_cells(ws, self.min_row, self.max_row,
+                                self.min_col, self.max_col)
+        }
+
     def __eq__(self, other):
         return self.min_row == other.min_row and \
                self.max_row == other.max_row and \
@@ -332,6 +459,71 @@ class Range:
         return '<Range: %s>' % str(self)
 
 
+def get_line_range(ws: Worksheet, pos: Position, direction: Direction,
+                   offset: int = 0) -> range:
+    """
+    Get the row/column indices of the cells starting ``offset`` cells
+    from ``pos`` and moving in the given direction up to the edge of the
+    data containing area of the worksheet.
+
+    :param ws: OpenPyXL Worksheet
+    :param pos: Start position
+    :param direction: Direction
+    :param offset: Distance of the first cell from ``pos``
+    :return: Range of row indices (UP/DOWN) or column indices (LEFT/RIGHT).
+             Empty if the first cell is outside of the data containing area.
+    """
+    bounds = SheetBounds.of(ws)
+    step = direction.d_row + direction.d_col
+
+    if direction.axis == Axis.COL:
+        start = pos.row + step * offset
+        lo, hi = bounds.min_row, bounds.max_row
+        other_ok = bounds.min_col <= pos.col <= bounds.max_col
+    else:
+        start = pos.col + step * offset
+        lo, hi = bounds.min_col, bounds.max_col
+        other_ok = bounds.min_row <= pos.row <= bounds.max_row
+
+    if not other_ok or not lo <= start <= hi:
+        return range(0)
+
+    return range(start, hi + 1 if step > 0 else lo - 1, step)
+
+
+def iter_direction_values(ws: Worksheet,
+                          pos: Position,
+                          direction: Direction,
+                          count: Optional[int] = None) -> Iterator[Any]:
+    """
+    Read the values of the cells starting at ``pos`` and moving in the
+    given direction without creating any cells.
+
+    :param ws: OpenPyXL Worksheet
+    :param pos: Start position
+    :param direction: Direction
+    :param count: Number of cells to read. By default, the cells up to the
+                  edge of the data containing area of the worksheet are read.
+                  The iteration always stops at the edge of the worksheet.
+    :return: Iterator of cell values
+    """
+    step = direction.d_row + direction.d_col
+
+    if direction.axis == Axis.COL:
+        start, limit, fixed, by_row = pos.row, MAX_ROWS, [pos.col], True
+    else:
+        start, limit, fixed, by_row = pos.col, MAX_COLS, [pos.row], False
+
+    if count is None:
+        lines = get_line_range(ws, pos, direction)
+    elif step > 0:
+        lines = range(start, min(start + count, limit + 1))
+    else:
+        lines = range(start, max(start - count, 0), -1)
+
+    return (v[0] for v in iter_line_values(ws, lines, fixed, by_row))
+
+
 class MarkerAbs:
     def get_position(self, ws: Worksheet) -> Position:
         pass
@@ -352,19 +544,35 @@ class MarkerName(MarkerAbs):
     def __init__(self, name: str):
         self.name = name
 
+    def _get_area(self, ws: Worksheet) -> NameArea:
+        areas = NameIndex.of(ws.parent).get(self.name, ws.title)
+        if areas is None:
+            raise InvalidPositionError('Defined name %s not found' % self.name)
+
+        # Use the first area in the worksheet
+        title = ws.title.lower()
+        for area in areas:
+            if area.sheet.lower() == title:
+                return area
+
+        raise InvalidPositionError(
+            'Marker %s not in worksheet %s' %
+            (self.name, ', '.join(a.sheet for a in areas) or '-'))
+
+    @timed('marker.name')
     def get_position(self, ws: Worksheet) -> Position:
-        dn = ws.parent.defined_names.get(self.name)
-        if dn:
-            # Parse defined name
-            pos, sheet_name = Position.from_abs_string(dn.value)
+        area = self._get_area(ws)
+        return Position._make(area.min_col, area.min_row)
 
-            if sheet_name != ws.title:
-                raise InvalidPositionError('Marker %s not in worksheet %s' %
-                                           (self.name, sheet_name))
+    def get_range(self, ws: Worksheet) -> 'Range':
+        """
+        Get the range the defined name refers to.
 
-            return pos
-        else:
-            raise InvalidPositionError('Defined name %s not found' % self.name)
+        :param ws: OpenPyXL worksheet
+        :return: Range
+        """
+        area = self._get_area(ws)
+        return Range(area.min_row, area.max_row, area.min_col, area.max_col)
 
 
 class MarkerPattern(MarkerAbs):
@@ -376,17 +584,280 @@ class MarkerPattern(MarkerAbs):
         self.max_range = max_range
         self.rex = re.compile(pattern)
 
+    def _search_area(self, initial_pos: Position) -> Tuple[tuple, Any]:
+        """
+        :return: (Search line clipped to the worksheet as
+                 (min_row, max_row, min_col, max_col),
+                 function picking the nearest of multiple (row, col) matches)
+        """
+        step = self.direction.d_row + self.direction.d_col
+        row, col = initial_pos.row, initial_pos.col
+
+        if self.direction.axis == Axis.COL:
+            end = min(max(row + step * self.max_range, 1), MAX_ROWS)
+            area = (min(row, end), max(row, end), col, col)
+        else:
+            end = min(max(col + step * self.max_range, 1), MAX_COLS)
+            area = (row, row, min(col, end), max(col, end))
+
+        return area, min if step > 0 else max
+
+    def _find_indexed(self, index: ValueIndex,
+                      initial_pos: Position) -> Optional[Position]:
+        area, pick = self._search_area(initial_pos)
+
+        matches = index.find(self.rex, *area)
+        if not matches:
+            return None
+
+        row, col = pick(matches)
+        return Position._make(col, row)
+
+    @timed('marker.pattern')
     def get_position(self, ws: Worksheet) -> Position:
         initial_pos = self.initial_marker.get_position(ws)
 
-        for d in range(self.max_range + 1):
-            pos = initial_pos.shifted(self.direction, d)
-            val = str(pos.get_cell(ws).value)
-
-            if self.rex.search(val):
+        # Use the value index of the worksheet if it already exists and
+        # has fewer distinct values than the cells to be checked.
+        # Empty cells are not indexed, so patterns matching 'None'
+        # have to scan the cells.
+        index = ValueIndex.of(ws)
+        if index.valid and len(index) <= self.max_range and \
+                not self.rex.search('None'):
+            pos = self._find_indexed(index, initial_pos)
+            if pos is not None:
+                return pos
+        else:
+            pos = self._scan(ws, initial_pos)
+            if pos is not None:
                 return pos
 
         raise InvalidPositionError(
             'Cell matching pattern %s max. %d cells %s from %s not found' %
             (str(self.rex), self.max_range, str(
                 self.direction), str(initial_pos)))
+
+    def _scan(self, ws: Worksheet,
+              initial_pos: Position) -> Optional[Position]:
+        values = itertools.chain(
+            iter_direction_values(ws, initial_pos, self.direction,
+                                  self.max_range + 1), itertools.repeat(None))
+
+        for d, value in zip(range(self.max_range + 1), values):
+            if self.rex.search(str(value)):
+                return initial_pos.shifted(self.direction, d)
+
+        return None
+
+
+class MarkerSearch(MarkerAbs):
+    """
+    Marker pointing to the first cell (in row-major order) whose value
+    matches a regular expression (using ``re.search``).
+
+    The search is done using the :class:`xcelios.sheet.ValueIndex` of the
+    worksheet, which is built once and shared by all search markers.
+
+    :param pattern: Regular expression
+    :param search_range: Area to search. Default: whole worksheet
+    """
+
+    def __init__(self,
+                 pattern: Union[str, re.Pattern],
+                 search_range: Optional['Range'] = None):
+        self.rex = re.compile(pattern)
+        self.search_range = search_range
+
+    def _search_area(self) -> tuple:
+        rg = self.search_range
+        if rg is None:
+            return 1, MAX_ROWS, 1, MAX_COLS
+        return rg.min_row, rg.max_row, rg.min_col, rg.max_col
+
+    def _find(self, ws: Worksheet, first: bool) -> List[Position]:
+        matches = ValueIndex.of(ws).find(self.rex,
+                                         *self._search_area(),
+                                         first=first)
+
+        return [Position._make(col, row) for row, col in matches]
+
+    @timed('marker.search')
+    def get_position(self, ws: Worksheet) -> Position:
+        matches = self._find(ws, True)
+        if not matches:
+            raise InvalidPositionError(
+                'Cell matching pattern %s not found in %s' %
+                (str(self.rex), str(self.search_range or ws.title)))
+        return matches[0]
+
+    def get_positions(self, ws: Worksheet) -> List[Position]:
+        """
+        Get the positions of all matching cells.
+
+        :param ws: OpenPyXL worksheet
+        :return: List of positions in row-major order
+        """
+        return self._find(ws, False)
+
+
+def _combine_patterns(rexes: Iterable[re.Pattern]) -> Optional[re.Pattern]:
+    """
+    Combine regular expressions into one that matches if any of them
+    matches.
+
+    :return: Combined pattern or None if the patterns cannot be combined
+             (e.g. because of global flags, backreferences or
+             conditionals referring to group numbers)
+    """
+    parts = []
+
+    for rex in rexes:
+        if not isinstance(rex.pattern, str) or \
+                rex.flags & re.ASCII or _BACKREF_RE.search(rex.pattern):
+            return None
+
+        flags = ''.join(c for f, c in _SCOPED_FLAGS if rex.flags & f)
+        parts.append('(?%s:%s)' % (flags, rex.pattern))
+
+    try:
+        return re.compile('|'.join(parts))
+    except re.error:
+        return None
+
+
+class MarkerSet:
+    """
+    Collection of markers that are resolved together.
+
+    - :class:`MarkerPos` markers are returned as they are
+    - :class:`MarkerName` markers are looked up in the shared
+      :class:`xcelios.refs.NameIndex` of the workbook
+    - :class:`MarkerPattern` and :class:`MarkerSearch` markers are
+      resolved in a single sweep over the distinct values of the worksheet
+      (see :class:`xcelios.sheet.ValueIndex`). Each value is first
+      matched against a combined pattern, only values matching it are
+      checked against the individual patterns.
+
+    Other markers are resolved one by one.
+
+    :param markers: Dict of key -> marker
+    """
+
+    def __init__(self, markers: Optional[Mapping[Hashable,
+                                                 MarkerAbs]] = None):
+        self.markers: Dict[Hashable, MarkerAbs] = dict(markers or dict())
+
+    def add(self, key: Hashable, marker: MarkerAbs):
+        """
+        Add a marker to the set.
+
+        :param key: Key of the marker in the result
+        :param marker: Marker
+        """
+        self.markers[key] = marker
+
+    @timed('marker.resolve_all')
+    def resolve(self, ws: Worksheet,
+                strict: bool = True) -> Dict[Hashable, Position]:
+        """
+        Get the positions of all markers.
+
+        :param ws: OpenPyXL worksheet
+        :param strict: Raise an error if a marker cannot be resolved.
+                       Otherwise the marker is missing in the result.
+        :raise InvalidPositionError: if a marker cannot be resolved
+        :return: Dict of key -> position
+        """
+        res = dict()
+        patterns = dict()
+
+        for key, marker in self.markers.items():
+            # Patterns matching 'None' have to check empty cells,
+            # which are not indexed
+            if isinstance(marker, MarkerSearch) or \
+                    (isinstance(marker, MarkerPattern)
+                     and not marker.rex.search('None')):
+                patterns[key] = marker
+                continue
+
+            try:
+                res[key] = marker.get_position(ws)
+            except InvalidPositionError:
+                pass
+
+        res.update(_resolve_patterns(ws, patterns))
+
+        missing = [key for key in self.markers if key not in res]
+        if strict and missing:
+            raise InvalidPositionError('Markers not found: %s' %
+                                       ', '.join(map(str, missing)))
+
+        return {key: res[key] for key in self.markers if key in res}
+
+
+def _collect_searches(ws: Worksheet,
+                      patterns: Dict[Hashable, MarkerAbs]) -> List[tuple]:
+    # Resolve the initial markers of the pattern markers first
+    initials = MarkerSet({
+        key: m.initial_marker
+        for key, m in patterns.items() if isinstance(m, MarkerPattern)
+    }).resolve(ws, strict=False)
+
+    searches = []
+    for key, marker in patterns.items():
+        if isinstance(marker, MarkerSearch):
+            searches.append((key, marker.rex, marker._search_area(), min))
+        elif key in initials:
+            searches.append(
+                (key, marker.rex) + marker._search_area(initials[key]))
+
+    return searches
+
+
+def _sweep_values(ws: Worksheet,
+                  searches: List[tuple]) -> Dict[Hashable, Tuple[int, int]]:
+    combined = _combine_patterns(rex for _, rex, _, _ in searches)
+    found = dict()
+
+    for text, coords in ValueIndex.of(ws).items():
+        if combined is not None and not combined.search(text):
+            continue
+
+        for key, rex, area, pick in searches:
+            if not rex.search(text):
+                continue
+
+            min_row, max_row, min_col, max_col = area
+            for c in coords:
+                if min_row <= c[0] <= max_row and min_col <= c[1] <= max_col:
+                    found[key] = pick(found[key], c) if key in found else c
+
+    return found
+
+
+def _resolve_patterns(ws: Worksheet, patterns: Dict[Hashable, MarkerAbs]
+                      ) -> Dict[Hashable, Position]:
+    if not patterns:
+        return dict()
+
+    found = _sweep_values(ws, _collect_searches(ws, patterns))
+
+    return {
+        key: Position._make(col, row)
+        for key, (row, col) in found.items()
+    }
+
+
+def resolve_all(ws: Worksheet, markers: Mapping[Hashable, MarkerAbs],
+                strict: bool = True) -> Dict[Hashable, Position]:
+    """
+    Resolve multiple markers together (see :class:`MarkerSet`).
+
+    :param ws: OpenPyXL worksheet
+    :param markers: Dict of key -> marker
+    :param strict: Raise an error if a marker cannot be resolved.
+                   Otherwise the marker is missing in the result.
+    :raise InvalidPositionError: if a marker cannot be resolved
+    :return: Dict of key -> position
+    """
+    return MarkerSet(markers).resolve(ws, strict)
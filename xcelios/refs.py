@@ -0,0 +1,576 @@
+import re
+from collections import OrderedDict
+from typing import (Callable, Dict, Iterator, List, NamedTuple, Optional, Set,
+                    Tuple)
+
+from openpyxl.cell import Cell
+from openpyxl.formula.tokenizer import Token, Tokenizer, TokenizerError
+from openpyxl.utils import column_index_from_string, get_column_letter
+from openpyxl.workbook import Workbook
+from openpyxl.worksheet.cell_range import MultiCellRange
+from openpyxl.worksheet.worksheet import Worksheet
+
+from xcelios.sheet import _SheetCache
+
+MAX_ROW = 1048576
+MAX_COL = 16384
+
+_SHEET_PART = r"'(?:[^']|'')+'|[^'!:\[\]]+"
+_END_PART = r'\$?[A-Za-z]{1,3}\$?\d+|\$?[A-Za-z]{1,3}|\$?\d+'
+_REF_RE = re.compile(r'^(?:(?P<sheet>%s)!)?(?P<a>%s)(?::(?P<b>%s))?$' %
+                     (_SHEET_PART, _END_PART, _END_PART))
+_END_RE = re.compile(r'^(\$?)([A-Za-z]*)(\$?)(\d*)$')
+
+REF_ERROR = '#REF!'
+
+
+def _parse_end(s: str) -> list:
+    """
+    Parse a reference endpoint (``$A$1``, ``A``, ``1``).
+
+    :return: [col absolute, col or None, row absolute, row or None]
+    """
+    m = _END_RE.match(s)
+    if not m.group(2):
+        # Row without column (``$1``)
+        return ['', None, m.group(1) or m.group(3), int(m.group(4))]
+
+    row = int(m.group(4)) if m.group(4) else None
+    return [m.group(1), column_index_from_string(m.group(2)), m.group(3), row]
+
+
+def _format_end(end: list) -> str:
+    res = ''
+    if end[1] is not None:
+        res += end[0] + get_column_letter(end[1])
+    if end[3] is not None:
+        res += end[2] + str(end[3])
+    return res
+
+
+def _shift_span(lo: int, hi: int, start: int,
+                delta: int) -> Optional[Tuple[int, int]]:
+    """
+    Shift the span lo..hi after the lines from ``start`` on were moved
+    by ``delta``.
+
+    :return: New span or None if the whole span was deleted
+    """
+    if delta > 0:
+        return (lo + delta if lo >= start else lo,
+                hi + delta if hi >= start else hi)
+
+    # Lines del_lo .. start-1 were deleted
+    del_lo = start + delta
+    if del_lo <= lo and hi < start:
+        return None
+
+    if lo >= start:
+        lo += delta
+    elif lo >= del_lo:
+        lo = del_lo
+
+    if hi >= start:
+        hi += delta
+    elif hi >= del_lo:
+        hi = del_lo - 1
+
+    return lo, hi
+
+
+class CellRef:
+    """
+    Cell or range reference in a formula, e.g. ``'My Sheet'!$A$1:B5``.
+
+    Whole columns (``A:C``) and whole rows (``1:3``) are supported.
+
+    :param sheet_prefix: Sheet part of the reference including the ``!``
+                         (empty for references without a sheet name)
+    :param ends: Endpoints (see :func:`_parse_end`)
+    """
+
+    def __init__(self, sheet_prefix: str, ends: List[list]):
+        self.sheet_prefix = sheet_prefix
+        self.ends = ends
+
+        title = sheet_prefix[:-1]
+        if title.startswith("'"):
+            title = title[1:-1].replace("''", "'")
+
+        # Worksheet title and lowercase title for comparisons
+        self.title: Optional[str] = title or None
+        self.sheet: Optional[str] = title.lower() if title else None
+
+    @classmethod
+    def parse(cls, ref: str) -> Optional['CellRef']:
+        """
+        Parse a reference.
+
+        :param ref: Reference string
+        :return: CellRef or None if the string is no cell/range reference
+                 (e.g. a defined name)
+        """
+        m = _REF_RE.match(ref)
+        if m is None:
+            return None
+
+        ends = [_parse_end(m.group('a'))]
+        if m.group('b'):
+            ends.append(_parse_end(m.group('b')))
+
+        # Columns and rows without the other part are only valid as ranges
+        kinds = {(e[1] is None, e[3] is None) for e in ends}
+        if len(kinds) != 1 or (len(ends) == 1 and kinds != {(False, False)}):
+            return None
+
+        for e in ends:
+            if (e[1] is not None and e[1] > MAX_COL) or \
+                    (e[3] is not None and not 0 < e[3] <= MAX_ROW):
+                return None
+
+        prefix = ref[:m.start('a')]
+        return cls(prefix, ends)
+
+    def shift(self, start: int, delta: int, by_row: bool = True) -> bool:
+        """
+        Update the reference after the rows (``by_row=True``) or columns
+        from ``start`` on were moved by ``delta`` (see
+        :func:`xcelios.sheet.move_lines`).
+
+        :return: True if the reference was changed
+        """
+        i = 3 if by_row else 1
+        limit = MAX_ROW if by_row else MAX_COL
+        first, last = self.ends[0], self.ends[-1]
+
+        if first[i] is None:
+            return False
+
+        lo, hi = sorted((first[i], last[i]))
+        span = _shift_span(lo, hi, start, delta)
+
+        if span is None or span[1] > limit:
+            self.ends = []
+            return True
+        if span == (lo, hi):
+            return False
+
+        if first[i] <= last[i]:
+            first[i], last[i] = span
+        else:
+            last[i], first[i] = span
+        return True
+
+    @property
+    def is_error(self) -> bool:
+        """True if the referenced cells were deleted"""
+        return not self.ends
+
+    def __str__(self):
+        if self.is_error:
+            return self.sheet_prefix + REF_ERROR
+        return self.sheet_prefix + ':'.join(_format_end(e) for e in self.ends)
+
+
+class Formula:
+    """
+    Formula tokenized once, with the positions of its cell references.
+
+    :param text: Formula (with or without leading ``=``)
+    :param sheet: Title of the worksheet that references without sheet name
+                  point to (None: these references are ignored)
+    """
+
+    def __init__(self, text: str, sheet: Optional[str] = None):
+        self.text = text
+        self.title = sheet
+        self.sheet = sheet.lower() if sheet else None
+        self.prefix = '=' if text.startswith('=') else ''
+
+        self.parts: List[str] = []
+        self.refs: List[Tuple[int, CellRef]] = []
+
+        try:
+            items = Tokenizer(self.prefix and text or '=' + text).items
+        except TokenizerError:
+            items = []
+
+        for item in items:
+            if item.type == Token.OPERAND and item.subtype == Token.RANGE:
+                ref = CellRef.parse(item.value)
+                if ref is not None:
+                    self.refs.append((len(self.parts), ref))
+            self.parts.append(item.value)
+
+    @property
+    def sheets(self) -> Set[str]:
+        """Lowercase titles of the referenced worksheets"""
+        res = {ref.sheet or self.sheet for _, ref in self.refs}
+        res.discard(None)
+        return res
+
+    def shift(self, sheet: str, start: int, delta: int,
+              by_row: bool = True) -> bool:
+        """
+        Update the references to a worksheet after rows or columns
+        were moved.
+
+        :param sheet: Title of the modified worksheet
+        :param start: First moved row/column
+        :param delta: Distance
+        :param by_row: Rows (True) or columns (False) were moved
+        :return: True if the formula was changed
+        """
+        sheet = sheet.lower()
+        changed = False
+
+        for i, ref in self.refs:
+            if (ref.sheet or self.sheet) != sheet or ref.is_error:
+                continue
+            if ref.shift(start, delta, by_row):
+                self.parts[i] = str(ref)
+                changed = True
+
+        if changed:
+            self.text = self.prefix + ''.join(self.parts)
+        return changed
+
+
+class _Entry:
+    """Formula stored somewhere in the workbook"""
+
+    def __init__(self, formula: Formula, setter: Callable[[str], None]):
+        self.formula = formula
+        self.setter = setter
+
+
+def _iter_defined_names(wb: Workbook) -> Iterator[tuple]:
+    """:return: Iterator of (DefinedName, title of the local sheet or None)"""
+    titles = wb.sheetnames
+    names = wb.defined_names
+    names = names.values() if hasattr(names, 'values') else \
+        names.definedName
+
+    for dn in names:
+        local = dn.localSheetId
+        sheet = titles[local] if local is not None and \
+            0 <= local < len(titles) else None
+        yield dn, sheet
+
+    # Newer OpenPyXL versions store local names in the worksheets
+    for ws in wb.worksheets:
+        for dn in getattr(ws, 'defined_names', dict()).values():
+            yield dn, ws.title
+
+
+class NameArea(NamedTuple):
+    """Area referenced by a defined name"""
+    sheet: str
+    min_row: int
+    max_row: int
+    min_col: int
+    max_col: int
+
+
+# Formula parts allowed between the areas of a multi-area name
+_AREA_SEPARATORS = {',', '(', ')', ''}
+
+
+def _parse_areas(formula: Formula) -> List[NameArea]:
+    """
+    Get the areas of a name that only consists of cell/range references.
+
+    :return: List of areas (empty for other names, e.g. constants or
+             formulas)
+    """
+    ref_parts = {i for i, _ in formula.refs}
+    if any(part.strip() not in _AREA_SEPARATORS
+           for i, part in enumerate(formula.parts) if i not in ref_parts):
+        return []
+
+    areas = []
+    for _, ref in formula.refs:
+        sheet = ref.title or formula.title
+        if sheet is None or ref.is_error:
+            return []
+
+        first, last = ref.ends[0], ref.ends[-1]
+        rows = (first[3] or 1, last[3] or MAX_ROW)
+        cols = (first[1] or 1, last[1] or MAX_COL)
+        areas.append(
+            NameArea(sheet, min(rows), max(rows), min(cols), max(cols)))
+
+    return areas
+
+
+class NameIndex(_SheetCache):
+    """
+    Index of the defined names of a workbook with their pre-parsed areas.
+
+    Workbook-scoped and sheet-scoped names, quoted sheet names, ranges and
+    multi-area names (``Sheet1!$A$1,'My Sheet'!$B$2:$C$4``) are supported.
+    Names whose value is not a plain reference (constants, formulas)
+    have no areas.
+
+    The index is rebuilt when names are added or removed. xcelios updates
+    it when it moves the cells a name points to. If you change the value of
+    a name by other means, call :meth:`invalidate`.
+
+    Use ``NameIndex.of(wb)`` to get the instance of a workbook.
+    """
+
+    def __init__(self, wb: Workbook):
+        super().__init__(wb)
+        self.wb = wb
+        self._names: Dict[Tuple[Optional[str], str], List[NameArea]] = dict()
+        self._count = 0
+
+    def _count_names(self) -> int:
+        return len(self.wb.defined_names) + sum(
+            len(getattr(ws, 'defined_names', ()))
+            for ws in self.wb.worksheets)
+
+    def _build(self):
+        self._names = dict()
+        self._count = 0
+
+        for dn, sheet in _iter_defined_names(self.wb):
+            self.update(dn, sheet, Formula(dn.attr_text or '', sheet))
+            self._count += 1
+
+    def update(self, dn, sheet: Optional[str], formula: Formula):
+        """
+        Store the areas of a defined name.
+
+        :param dn: OpenPyXL DefinedName
+        :param sheet: Title of the worksheet the name is local to
+                      (None for workbook-scoped names)
+        :param formula: Tokenized value of the name
+        """
+        key = (sheet.lower() if sheet else None, dn.name.lower())
+        self._names[key] = _parse_areas(formula)
+
+    def get(self, name: str,
+            sheet: Optional[str] = None) -> Optional[List[NameArea]]:
+        """
+        Get the areas of a defined name.
+
+        :param name: Name (case insensitive)
+        :param sheet: Title of the worksheet the name is used in.
+                      Names local to this worksheet take precedence over
+                      workbook-scoped names.
+        :return: List of areas or None if the name is not defined
+        """
+        if self._valid and self._count != self._count_names():
+            self._valid = False
+        self._ensure()
+
+        name = name.lower()
+        if sheet is not None:
+            areas = self._names.get((sheet.lower(), name))
+            if areas is not None:
+                return areas
+        return self._names.get((None, name))
+
+
+def _set_name(dn, sheet: Optional[str], formula: Formula,
+              names: NameIndex) -> Callable[[str], None]:
+    def setter(text: str):
+        dn.attr_text = text
+        if names._valid:
+            names.update(dn, sheet, formula)
+
+    return setter
+
+
+def _set_attr(obj, attr: str) -> Callable[[str], None]:
+    return lambda text: setattr(obj, attr, text)
+
+
+def _set_item(lst: list, i: int) -> Callable[[str], None]:
+    def setter(text: str):
+        lst[i] = text
+
+    return setter
+
+
+def _shift_multi_range(sqref: MultiCellRange, start: int, delta: int,
+                       by_row: bool) -> str:
+    """:return: New range string (empty if all ranges were deleted)"""
+    res = []
+    for rg in sqref.ranges:
+        ref = CellRef.parse(rg.coord)
+        ref.shift(start, delta, by_row)
+        if not ref.is_error:
+            res.append(str(ref))
+    return ' '.join(res)
+
+
+class ReferenceIndex(_SheetCache):
+    """
+    Index of all cell references in a workbook: formulas of cells,
+    defined names (used by :class:`xcelios.position.MarkerName`),
+    data validations and conditional formatting rules.
+
+    Every formula is tokenized once when the index is built. When rows or
+    columns of a worksheet are inserted or deleted, only the references
+    pointing to this worksheet are rewritten. Merged cells, data validation
+    and conditional formatting ranges of the worksheet are updated, too.
+
+    xcelios updates the index when it writes cells. If you add or modify
+    formulas, names, data validations or conditional formatting by other
+    means or rename worksheets, call :meth:`invalidate`.
+
+    Use ``ReferenceIndex.of(wb)`` to get the instance of a workbook.
+    """
+
+    def __init__(self, wb: Workbook):
+        super().__init__(wb)
+        self.wb = wb
+        self._by_sheet: Dict[str, Set[_Entry]] = dict()
+        self._cells: Dict[Cell, _Entry] = dict()
+
+    def _add(self, entry: _Entry):
+        for sheet in entry.formula.sheets:
+            self._by_sheet.setdefault(sheet, set()).add(entry)
+
+    def _remove(self, entry: _Entry):
+        for entries in self._by_sheet.values():
+            entries.discard(entry)
+
+    def _add_formula(self, text, sheet: Optional[str],
+                     setter: Callable[[str], None]) -> Optional[_Entry]:
+        if not isinstance(text, str):
+            return None
+
+        formula = Formula(text, sheet)
+        if not formula.refs:
+            return None
+
+        entry = _Entry(formula, setter)
+        self._add(entry)
+        return entry
+
+    def _add_cell(self, cell: Cell):
+        if cell.data_type != 'f':
+            return
+
+        entry = self._add_formula(cell.value, cell.parent.title,
+                                  _set_attr(cell, 'value'))
+        if entry is not None:
+            self._cells[cell] = entry
+
+    def _build_sheet(self, ws: Worksheet):
+        for cell in ws._cells.values():
+            self._add_cell(cell)
+
+        for dv in ws.data_validations.dataValidation:
+            for attr in ('formula1', 'formula2'):
+                self._add_formula(getattr(dv, attr), ws.title,
+                                  _set_attr(dv, attr))
+
+        for cf in ws.conditional_formatting:
+            for rule in cf.rules:
+                for i, text in enumerate(rule.formula):
+                    self._add_formula(text, ws.title,
+                                      _set_item(rule.formula, i))
+
+    def _build(self):
+        self._by_sheet = dict()
+        self._cells = dict()
+
+        names = NameIndex.of(self.wb)
+
+        for dn, sheet in _iter_defined_names(self.wb):
+            if not isinstance(dn.attr_text, str):
+                continue
+
+            formula = Formula(dn.attr_text, sheet)
+            if formula.refs:
+                self._add(
+                    _Entry(formula, _set_name(dn, sheet, formula, names)))
+
+        for ws in self.wb.worksheets:
+            if hasattr(ws, '_cells'):
+                self._build_sheet(ws)
+
+    def update(self, cell: Cell):
+        """
+        Update the index after the value of a cell was modified.
+
+        :param cell: OpenPyXL Cell
+        """
+        if not self._valid:
+            return
+
+        entry = self._cells.pop(cell, None)
+        if entry is not None:
+            self._remove(entry)
+        self._add_cell(cell)
+
+    def shift(self, ws: Worksheet, start: int, delta: int,
+              by_row: bool = True):
+        """
+        Update all references to a worksheet after its rows
+        (``by_row=True``) or columns from ``start`` on were moved
+        by ``delta`` (see :func:`xcelios.sheet.move_lines`).
+        References to deleted cells become ``#REF!``.
+
+        :param ws: OpenPyXL Worksheet
+        :param start: First moved row/column
+        :param delta: Distance
+        :param by_row: Rows (True) or columns (False) were moved
+        """
+        if delta == 0:
+            return
+        self._ensure()
+
+        for entry in list(self._by_sheet.get(ws.title.lower(), ())):
+            if entry.formula.shift(ws.title, start, delta, by_row):
+                entry.setter(entry.formula.text)
+
+        _shift_merged_cells(ws, start, delta, by_row)
+        _shift_data_validations(ws, start, delta, by_row)
+        _shift_conditional_formatting(ws, start, delta, by_row)
+
+
+def _shift_merged_cells(ws: Worksheet, start: int, delta: int, by_row: bool):
+    for mcr in list(ws.merged_cells.ranges):
+        ref = CellRef.parse(mcr.coord)
+        if not ref.shift(start, delta, by_row):
+            continue
+
+        if ref.is_error:
+            ws.merged_cells.remove(mcr)
+            continue
+
+        first, last = ref.ends[0], ref.ends[-1]
+        mcr.min_col, mcr.min_row = first[1], first[3]
+        mcr.max_col, mcr.max_row = last[1], last[3]
+
+
+def _shift_data_validations(ws: Worksheet, start: int, delta: int,
+                            by_row: bool):
+    dvs = ws.data_validations.dataValidation
+
+    for dv in list(dvs):
+        sqref = _shift_multi_range(dv.sqref, start, delta, by_row)
+        if sqref:
+            dv.sqref = MultiCellRange(sqref)
+        else:
+            dvs.remove(dv)
+
+
+def _shift_conditional_formatting(ws: Worksheet, start: int, delta: int,
+                                  by_row: bool):
+    cf_list = ws.conditional_formatting
+    rules = OrderedDict()
+
+    for cf, cf_rules in cf_list._cf_rules.items():
+        sqref = _shift_multi_range(cf.sqref, start, delta, by_row)
+        if sqref:
+            cf.sqref = MultiCellRange(sqref)
+            rules.setdefault(cf, []).extend(cf_rules)
+
+    # The rules are stored by range, so the dict has to be rebuilt
+    cf_list._cf_rules = rules
@@ -0,0 +1,663 @@
+import itertools
+import sys
+from typing import (Any, Dict, Iterator, List, Optional, Pattern, Sequence,
+                    Set, Tuple)
+
+from openpyxl.cell import Cell
+from openpyxl.cell.read_only import EmptyCell
+from openpyxl.formula.translate import Translator
+from openpyxl.worksheet.worksheet import Worksheet
+
+
+class _SheetCache:
+    """
+    Base class for data that is computed once per worksheet (or workbook)
+    and shared by all tables and markers working on it.
+
+    The instances are stored as attributes of the worksheet (or workbook),
+    so they are garbage collected together with it.
+    """
+    _attr: str
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._attr = '_xcelios_' + cls.__name__
+
+    def __init__(self, ws: Worksheet):
+        self.ws = ws
+        self._valid = False
+
+    @classmethod
+    def of(cls, ws: Worksheet):
+        """
+        Get the shared instance of a worksheet.
+
+        :param ws: OpenPyXL Worksheet
+        :return: Shared instance
+        """
+        obj = ws.__dict__.get(cls._attr)
+        if obj is None:
+            obj = cls(ws)
+            setattr(ws, cls._attr, obj)
+        return obj
+
+    def _build(self):
+        raise NotImplementedError
+
+    def refresh(self):
+        """Recalculate the data from the cells of the worksheet"""
+        self._build()
+        self._valid = True
+
+    def invalidate(self):
+        """
+        Mark the data as outdated. It will be recalculated on the
+        next access.
+        """
+        self._valid = False
+
+    @property
+    def valid(self) -> bool:
+        """True if the data is calculated and up to date"""
+        return self._valid
+
+    def _ensure(self):
+        if not self._valid:
+            self.refresh()
+
+
+class SheetBounds(_SheetCache):
+    """
+    Snapshot of the data containing area of a worksheet.
+
+    OpenPyXL scans every cell of the worksheet whenever ``ws.min_row``,
+    ``ws.max_row``, ``ws.min_column`` or ``ws.max_column`` is read.
+    This object computes all four values in one pass and keeps them
+    until it is invalidated.
+
+    xcelios invalidates the bounds whenever it writes or moves cells.
+    If you modify a worksheet by other means, call :meth:`invalidate`
+    yourself.
+
+    Use :meth:`of` to get the instance shared by all tables and markers
+    working on a worksheet.
+    """
+
+    def __init__(self, ws: Worksheet):
+        super().__init__(ws)
+        self._min_row = 1
+        self._max_row = 1
+        self._min_col = 1
+        self._max_col = 1
+
+    def _build(self):
+        cells = getattr(self.ws, '_cells', None)
+
+        if cells is None:
+            # Read-only worksheets take their dimensions from the file.
+            # Unsized worksheets have to be scanned once.
+            if self.ws.max_row is None or self.ws.max_column is None:
+                self.ws.calculate_dimension(force=True)
+
+            self._min_row = self.ws.min_row
+            self._max_row = self.ws.max_row
+            self._min_col = self.ws.min_column
+            self._max_col = self.ws.max_column
+        elif cells:
+            rows = {k[0] for k in cells}
+            cols = {k[1] for k in cells}
+            self._min_row = min(rows)
+            self._max_row = max(rows)
+            self._min_col = min(cols)
+            self._max_col = max(cols)
+        else:
+            self._min_row = self._max_row = 1
+            self._min_col = self._max_col = 1
+
+    @property
+    def min_row(self) -> int:
+        self._ensure()
+        return self._min_row
+
+    @property
+    def max_row(self) -> int:
+        self._ensure()
+        return self._max_row
+
+    @property
+    def min_col(self) -> int:
+        self._ensure()
+        return self._min_col
+
+    @property
+    def max_col(self) -> int:
+        self._ensure()
+        return self._max_col
+
+    def contains(self, row: int, col: int) -> bool:
+        """
+        Check if a cell is within the data containing area of the
+        worksheet.
+
+        :param row: Row index
+        :param col: Column index
+        :return: True if the cell is inside the bounds
+        """
+        if not self._valid:
+            self._ensure()
+        return self._min_row <= row <= self._max_row and \
+            self._min_col <= col <= self._max_col
+
+    def __contains__(self, pos) -> bool:
+        return self.contains(pos.row, pos.col)
+
+    def __repr__(self):
+        return '<SheetBounds: %s R%d:%d C%d:%d>' % (
+            self.ws.title, self.min_row, self.max_row, self.min_col,
+            self.max_col)
+
+
+def is_cell_occupied(cell: Cell) -> bool:
+    """
+    Check if a cell has a value, a comment or a style.
+
+    :param cell: OpenPyXL Cell
+    :return: True if the cell is not empty
+    """
+    return cell.value is not None or \
+        getattr(cell, 'comment', None) is not None or \
+        getattr(cell, 'has_style', False)
+
+
+class OccupancyIndex(_SheetCache):
+    """
+    Index of the non-empty cells of a worksheet (cells with a value,
+    a comment or a style).
+
+    The index stores the occupied columns of every row and the occupied
+    rows of every column, so checking if a row or column is empty does not
+    require visiting its cells.
+
+    xcelios updates the index when it inserts/deletes rows or columns
+    and when it writes cells. If you modify a worksheet by other means,
+    call :meth:`invalidate`.
+
+    Use :meth:`of` to get the instance shared by all tables working on
+    a worksheet.
+    """
+
+    def __init__(self, ws: Worksheet):
+        super().__init__(ws)
+        self._rows: Dict[int, Set[int]] = dict()
+        self._cols: Dict[int, Set[int]] = dict()
+
+    def _iter_occupied(self) -> Iterator[Tuple[int, int]]:
+        """:return: Iterator of the (row, col) coordinates of all
+        occupied cells"""
+        cells = getattr(self.ws, '_cells', None)
+
+        if cells is None:
+            for row in self.ws.iter_rows():
+                for cell in row:
+                    if is_cell_occupied(cell):
+                        yield cell.row, cell.column
+        else:
+            # Most cells have a value, which is checked first
+            # without calling is_cell_occupied
+            for coord, cell in cells.items():
+                if cell._value is not None or is_cell_occupied(cell):
+                    yield coord
+
+    def _build(self):
+        rows: Dict[int, Set[int]] = dict()
+        cols: Dict[int, Set[int]] = dict()
+
+        for row, col in self._iter_occupied():
+            members = rows.get(row)
+            if members is None:
+                members = rows[row] = set()
+            members.add(col)
+
+            members = cols.get(col)
+            if members is None:
+                members = cols[col] = set()
+            members.add(row)
+
+        self._rows = rows
+        self._cols = cols
+
+    def _add(self, row: int, col: int):
+        self._rows.setdefault(row, set()).add(col)
+        self._cols.setdefault(col, set()).add(row)
+
+    def _discard(self, row: int, col: int):
+        cols = self._rows.get(row)
+        if cols is None or col not in cols:
+            return
+
+        cols.discard(col)
+        if not cols:
+            del self._rows[row]
+
+        rows = self._cols[col]
+        rows.discard(row)
+        if not rows:
+            del self._cols[col]
+
+    def remove(self, row: int, col: int):
+        """
+        Update the index after a cell was removed from the worksheet.
+
+        :param row: Row index
+        :param col: Column index
+        """
+        if self._valid:
+            self._discard(row, col)
+
+    def is_empty(self, row: int, col: int) -> bool:
+        """
+        Check if a cell is empty.
+
+        :param row: Row index
+        :param col: Column index
+        :return: True if the cell is empty
+        """
+        self._ensure()
+        return col not in self._rows.get(row, ())
+
+    def cols_in_row(self, row: int) -> Set[int]:
+        """
+        Get the indices of the occupied columns in a row.
+
+        :param row: Row index
+        :return: Set of column indices (do not modify)
+        """
+        self._ensure()
+        return self._rows.get(row, set())
+
+    def rows_in_col(self, col: int) -> Set[int]:
+        """
+        Get the indices of the occupied rows in a column.
+
+        :param col: Column index
+        :return: Set of row indices (do not modify)
+        """
+        self._ensure()
+        return self._cols.get(col, set())
+
+    def next_occupied(self, fixed: int, start: int, step: int,
+                      by_row: bool) -> Optional[int]:
+        """
+        Find the next occupied cell in a column or row.
+
+        :param fixed: Column index (``by_row=True``) or row index
+        :param start: Row index (``by_row=True``) or column index to start
+                      from (exclusive)
+        :param step: Search direction: 1 or -1
+        :param by_row: Search along a column through its rows (True) or
+                       along a row through its columns (False)
+        :return: Row/column index of the next occupied cell or None
+        """
+        indices = self.rows_in_col(fixed) if by_row else \
+            self.cols_in_row(fixed)
+
+        if step > 0:
+            return min((i for i in indices if i > start), default=None)
+        return max((i for i in indices if i < start), default=None)
+
+    def update(self, cell: Cell):
+        """
+        Update the index after a cell was modified.
+
+        :param cell: OpenPyXL Cell
+        """
+        if not self._valid:
+            return
+
+        if is_cell_occupied(cell):
+            self._add(cell.row, cell.column)
+        else:
+            self._discard(cell.row, cell.column)
+
+    def shift(self, start: int, delta: int, by_row: bool = True):
+        """
+        Update the index after rows (``by_row=True``) or columns were
+        moved: all lines from ``start`` are moved by ``delta``.
+        When moving up/left, the lines overwritten by the moved lines
+        are removed.
+
+        :param start: First moved row/column
+        :param delta: Distance
+        :param by_row: Move rows (True) or columns (False)
+        """
+        if not self._valid or delta == 0:
+            return
+
+        def new_index(i: int) -> Optional[int]:
+            if i >= start:
+                return i + delta
+            if start + delta <= i:
+                return None
+            return i
+
+        lines, others = (self._rows, self._cols) if by_row else \
+            (self._cols, self._rows)
+
+        new_lines = dict()
+        for i, members in lines.items():
+            ni = new_index(i)
+            if ni is not None:
+                new_lines[ni] = members
+
+        new_others = dict()
+        for j, members in others.items():
+            moved = {new_index(i) for i in members}
+            moved.discard(None)
+            if moved:
+                new_others[j] = moved
+
+        if by_row:
+            self._rows, self._cols = new_lines, new_others
+        else:
+            self._cols, self._rows = new_lines, new_others
+
+
+class ValueIndex(_SheetCache):
+    """
+    Index of the non-empty cell values of a worksheet for searching cells
+    by their content.
+
+    The index maps the string representation of every value to the
+    coordinates of the cells holding it, so a pattern only has to be
+    matched once per distinct value instead of once per cell.
+
+    xcelios invalidates the index whenever it writes or moves cells.
+    If you modify a worksheet by other means, call :meth:`invalidate`.
+
+    Use :meth:`of` to get the instance shared by all markers working on
+    a worksheet.
+    """
+
+    def __init__(self, ws: Worksheet):
+        super().__init__(ws)
+        self._values: Dict[str, List[Tuple[int, int]]] = dict()
+
+    def _iter_values(self) -> Iterator[Tuple[Tuple[int, int], Any]]:
+        cells = getattr(self.ws, '_cells', None)
+
+        if cells is None:
+            rows = self.ws.iter_rows(values_only=True)
+            for row, values in enumerate(rows, 1):
+                for col, value in enumerate(values, 1):
+                    yield (row, col), value
+        else:
+            for coord, cell in cells.items():
+                yield coord, cell.value
+
+    def _build(self):
+        values = dict()
+
+        for coord, value in self._iter_values():
+            if value is not None:
+                values.setdefault(str(value), []).append(coord)
+
+        for coords in values.values():
+            coords.sort()
+        self._values = values
+
+    def items(self) -> Iterator[Tuple[str, List[Tuple[int, int]]]]:
+        """
+        :return: Iterator of (value as string, list of (row, col)
+                 coordinates of the cells holding it in row-major order)
+        """
+        self._ensure()
+        return iter(self._values.items())
+
+    def __len__(self) -> int:
+        """:return: Number of distinct values"""
+        self._ensure()
+        return len(self._values)
+
+    def find(self,
+             rex: Pattern,
+             min_row: int = 1,
+             max_row: Optional[int] = None,
+             min_col: int = 1,
+             max_col: Optional[int] = None,
+             first: bool = False) -> List[Tuple[int, int]]:
+        """
+        Find the cells whose value (converted to a string) matches
+        a regular expression (using ``rex.search``).
+
+        :param rex: Compiled regular expression
+        :param min_row: First row of the search area
+        :param max_row: Last row of the search area (default: no limit)
+        :param min_col: First column of the search area
+        :param max_col: Last column of the search area (default: no limit)
+        :param first: Only return the first match
+        :return: List of (row, col) coordinates in row-major order
+        """
+        self._ensure()
+        max_row = max_row or sys.maxsize
+        max_col = max_col or sys.maxsize
+        res = []
+
+        for text, coords in self._values.items():
+            if not rex.search(text):
+                continue
+
+            matches = (c for c in coords
+                       if min_row <= c[0] <= max_row
+                       and min_col <= c[1] <= max_col)
+            if first:
+                res.extend(itertools.islice(matches, 1))
+            else:
+                res.extend(matches)
+
+        res.sort()
+        return res[:1] if first else res
+
+
+def move_lines(ws: Worksheet,
+               start: int,
+               delta: int,
+               by_row: bool = True,
+               translate: bool = True):
+    """
+    Move all rows (``by_row=True``) or columns from ``start`` on
+    by ``delta``.
+
+    When moving up/left (``delta < 0``), the lines ``start + delta``
+    to ``start - 1`` are deleted.
+
+    Every existing cell is moved once, no new cells are created.
+    Like ``ws.move_range(translate=True)``, the references in the
+    formulas of the moved cells are shifted by ``delta``.
+
+    :param ws: OpenPyXL Worksheet
+    :param start: First row/column to move
+    :param delta: Distance
+    :param by_row: Move rows (True) or columns (False)
+    :param translate: Translate the formulas of the moved cells
+    """
+    if delta == 0:
+        return
+    if start + delta < 1:
+        raise ValueError('Cannot move line %d by %d' % (start, delta))
+
+    row_delta, col_delta = (delta, 0) if by_row else (0, delta)
+    translated: Dict[str, str] = dict()
+    removed_from = start + delta if delta < 0 else start
+
+    cells = ws._cells
+    new_cells = dict()
+
+    for (row, col), cell in cells.items():
+        line = row if by_row else col
+
+        if line < removed_from:
+            new_cells[(row, col)] = cell
+            continue
+        if line < start:
+            continue
+
+        if translate and cell.data_type == 'f' and \
+                isinstance(cell.value, str):
+            formula = cell.value
+            if formula not in translated:
+                translated[formula] = Translator(
+                    formula, cell.coordinate).translate_formula(
+                        row_delta=row_delta, col_delta=col_delta)
+            cell.value = translated[formula]
+
+        cell.row = row + row_delta
+        cell.column = col + col_delta
+        new_cells[(cell.row, cell.column)] = cell
+
+    # Keep the dict object, it may be referenced elsewhere
+    cells.clear()
+    cells.update(new_cells)
+
+
+def is_read_only(ws: Worksheet) -> bool:
+    """
+    Check if a worksheet was opened with
+    ``openpyxl.load_workbook(read_only=True)``.
+
+    Read-only worksheets do not support random cell access,
+    they can only be read row by row.
+
+    :param ws: OpenPyXL Worksheet or ReadOnlyWorksheet
+    :return: True if the worksheet is read-only
+    """
+    return not hasattr(ws, '_cells')
+
+
+def peek_cell(ws: Worksheet, row: int, col: int) -> Optional[Cell]:
+    """
+    Get a cell of a worksheet without creating it.
+
+    :param ws: OpenPyXL Worksheet or ReadOnlyWorksheet
+    :param row: Row index
+    :param col: Column index
+    :return: Cell or None if the cell does not exist
+    """
+    if is_read_only(ws):
+        cell = ws._get_cell(row, col)
+        return None if isinstance(cell, EmptyCell) else cell
+    return ws._cells.get((row, col))
+
+
+def iter_cells(ws: Worksheet, min_row: int, max_row: int, min_col: int,
+               max_col: int) -> Iterator[Cell]:
+    """
+    Iterate over the existing cells of an area in row-major order
+    without creating any cells.
+
+    :param ws: OpenPyXL Worksheet or ReadOnlyWorksheet
+    :param min_row: First row
+    :param max_row: Last row
+    :param min_col: First column
+    :param max_col: Last column
+    :return: Iterator of cells
+    """
+    if is_read_only(ws):
+        for row in ws.iter_rows(min_row=min_row,
+                                max_row=max_row,
+                                min_col=min_col,
+                                max_col=max_col):
+            yield from (c for c in row if not isinstance(c, EmptyCell))
+        return
+
+    cells = ws._cells
+    area = (max_row - min_row + 1) * (max_col - min_col + 1)
+
+    # Look up every coordinate of small areas, filter the cell storage
+    # for large ones
+    if area <= len(cells):
+        coords = itertools.product(range(min_row, max_row + 1),
+                                   range(min_col, max_col + 1))
+        found = (cells.get(coord) for coord in coords)
+        yield from (c for c in found if c is not None)
+    else:
+        yield from (cells[coord] for coord in sorted(
+            (r, c) for r, c in cells
+            if min_row <= r <= max_row and min_col <= c <= max_col))
+
+
+def iter_line_values(ws: Worksheet,
+                     lines: range,
+                     fixed: Sequence[int],
+                     by_row: bool = True) -> Iterator[tuple]:
+    """
+    Read the values of selected cells line by line without creating
+    any cells in the worksheet.
+
+    Example: ``iter_line_values(ws, range(4, 10), [2, 5])`` yields the values
+    of the cells B4, E4, then B5, E5 and so on.
+
+    Read-only worksheets are read with a single forward pass over
+    their row stream.
+
+    :param ws: OpenPyXL Worksheet or ReadOnlyWorksheet
+    :param lines: Row indices (``by_row=True``) or column indices to read
+    :param fixed: Column indices (``by_row=True``) or row indices to read
+                  in every line
+    :param by_row: Lines are rows (True) or columns (False)
+    :return: Iterator of value tuples, one per line
+    """
+    if is_read_only(ws):
+        return _iter_stream_values(ws, lines, fixed, by_row)
+    return _iter_dict_values(ws, lines, fixed, by_row)
+
+
+def _iter_dict_values(ws: Worksheet, lines: range, fixed: Sequence[int],
+                      by_row: bool) -> Iterator[tuple]:
+    get = ws._cells.get
+
+    for line in lines:
+        if by_row:
+            cells = [get((line, c)) for c in fixed]
+        else:
+            cells = [get((r, line)) for r in fixed]
+
+        yield tuple(None if c is None else c.value for c in cells)
+
+
+def _iter_stream_values(ws, lines: range, fixed: Sequence[int],
+                        by_row: bool) -> Iterator[tuple]:
+    if not lines or not fixed:
+        return
+
+    if lines.step < 0:
+        # Row streams can only be read forward
+        yield from reversed(
+            list(_iter_stream_values(ws, lines[::-1], fixed, by_row)))
+        return
+
+    if by_row:
+        min_col = min(fixed)
+        idxs = [c - min_col for c in fixed]
+
+        rows = ws.iter_rows(min_row=lines.start,
+                            max_row=lines[-1],
+                            min_col=min_col,
+                            max_col=max(fixed),
+                            values_only=True)
+
+        for row, _ in zip(rows, lines):
+            yield tuple(row[i] if i < len(row) else None for i in idxs)
+    else:
+        # Transpose the rows holding the fixed cells
+        min_row = min(fixed)
+        rows = list(
+            ws.iter_rows(min_row=min_row,
+                         max_row=max(fixed),
+                         min_col=lines.start,
+                         max_col=lines[-1],
+                         values_only=True))
+        sel = [rows[r - min_row] if r - min_row < len(rows) else ()
+               for r in fixed]
+
+        for i in range(len(lines)):
+            yield tuple(row[i] if i < len(row) else None for row in sel)
@@ -0,0 +1,199 @@
+import functools
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+# Callback called after every timed phase: callback(phase, seconds)
+PhaseCallback = Callable[[str, float], None]
+
+# Stats objects currently collecting (see collect)
+_active: List['Stats'] = []
+
+# Original methods replaced by counting versions while collecting
+_originals: Dict[tuple, Callable] = dict()
+
+
+class Stats:
+    """
+    Timings and counters collected while a :func:`collect` block is active.
+
+    - ``times``: wall time per phase in seconds. Phases can be nested
+      (e.g. ``adjust_space`` is part of ``write_datasets``), the time of
+      inner phases is included in the outer phase.
+    - ``calls``: number of calls per phase
+    - ``counts``: counters
+
+      - ``cells_read``: header and body cells visited by tables
+      - ``cells_written``: cells written by tables
+      - ``cells_created``: worksheet cells created (including cells
+        created as a side effect of reading)
+      - ``positions``: Position objects created
+      - ``lines_inserted``, ``lines_deleted``: rows/columns inserted or
+        deleted to resize tables
+
+    :param callback: Function called after every timed phase with the
+                     phase name and its duration in seconds
+    """
+
+    def __init__(self, callback: Optional[PhaseCallback] = None):
+        self.callback = callback
+        self.times: Dict[str, float] = dict()
+        self.calls: Dict[str, int] = dict()
+        self.counts: Dict[str, int] = dict()
+
+    def add_time(self, phase: str, seconds: float):
+        """
+        Record a call of a phase.
+
+        :param phase: Phase name
+        :param seconds: Duration
+        """
+        self.times[phase] = self.times.get(phase, 0.0) + seconds
+        self.calls[phase] = self.calls.get(phase, 0) + 1
+
+        if self.callback is not None:
+            self.callback(phase, seconds)
+
+    def add(self, name: str, n: int = 1):
+        """
+        Increase a counter.
+
+        :param name: Counter name
+        :param n: Amount
+        """
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def reset(self):
+        """Reset all timings and counters"""
+        self.times.clear()
+        self.calls.clear()
+        self.counts.clear()
+
+    def as_dict(self) -> dict:
+        """
+        :return: Dict with the keys ``times``, ``calls`` and ``counts``
+        """
+        return {
+            'times': dict(self.times),
+            'calls': dict(self.calls),
+            'counts': dict(self.counts),
+        }
+
+    def __repr__(self):
+        return '<Stats: %s>' % self.as_dict()
+
+
+def enabled() -> bool:
+    """:return: True if statistics are being collected"""
+    return bool(_active)
+
+
+def count(name: str, n: int = 1):
+    """
+    Increase a counter of all active Stats objects.
+
+    :param name: Counter name
+    :param n: Amount
+    """
+    for stats in _active:
+        stats.add(name, n)
+
+
+def timed(phase: str) -> Callable[[Callable], Callable]:
+    """
+    Decorator recording the wall time of a function as a phase
+    while statistics are being collected.
+
+    :param phase: Phase name
+    :return: Decorator
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _active:
+                return func(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                for stats in _active:
+                    stats.add_time(phase, seconds)
+
+        return wrapper
+
+    return decorator
+
+
+def _counting(func: Callable, name: str) -> Callable:
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        count(name)
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def _patch():
+    # Object creation is only counted while collecting, so the
+    # constructors run at full speed otherwise
+    from openpyxl.cell.cell import Cell
+
+    from xcelios.position import Position
+
+    _originals[(Position, '__init__')] = Position.__init__
+    _originals[(Position, '_make')] = Position.__dict__['_make']
+    _originals[(Cell, '__init__')] = Cell.__init__
+
+    Position.__init__ = _counting(Position.__init__, 'positions')
+    Position._make = classmethod(
+        _counting(Position.__dict__['_make'].__func__, 'positions'))
+    Cell.__init__ = _counting(Cell.__init__, 'cells_created')
+
+
+def _unpatch():
+    for (cls, attr), original in _originals.items():
+        setattr(cls, attr, original)
+    _originals.clear()
+
+
+@contextmanager
+def collect(stats: Optional[Stats] = None,
+            callback: Optional[PhaseCallback] = None) -> Iterator[Stats]:
+    """
+    Collect timings and counters of table and marker operations
+    within a ``with`` block.
+
+    Example::
+
+        with stats.collect() as st:
+            tab = Table(ws, MarkerName('table'), Person)
+            tab.read_datasets()
+        print(st.times['read_datasets'], st.counts['cells_read'])
+
+    Collection is global (not per thread). Object creation is counted by
+    temporarily replacing the constructors of ``Position`` and
+    ``openpyxl.cell.Cell``. Without an active block, the only overhead
+    is a check in every timed function.
+
+    :param stats: Stats object to add to (default: new object)
+    :param callback: Function called after every timed phase with the
+                     phase name and its duration in seconds
+                     (only used for a new Stats object)
+    :return: Stats object
+    """
+    if stats is None:
+        stats = Stats(callback)
+
+    if not _active:
+        _patch()
+    _active.append(stats)
+
+    try:
+        yield stats
+    finally:
+        _active.remove(stats)
+        if not _active:
+            _unpatch()
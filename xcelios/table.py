@@ -1,12 +1,28 @@
-import re
+import itertools
+from collections.abc import MutableSequence
 from datetime import datetime
-from typing import Any, Dict, Type
+from typing import (Any, Dict, Iterable, Iterator, List, Optional, Sequence,
+                    Tuple, Type)
 
+from openpyxl.cell import Cell
+from openpyxl.utils.datetime import CALENDAR_WINDOWS_1900
 from openpyxl.worksheet.worksheet import Worksheet
 
-from xcelios.position import Axis, Direction, MarkerAbs, Position, Range
-
-
+from xcelios.columns import to_array
+from xcelios.convert import get_converter, get_decoder, resolve_type
+from xcelios.dates import DateParser
+from xcelios.headers import get_matcher
+from xcelios.layout import Layout, LayoutCache
+from xcelios.position import (Axis, Direction, MarkerAbs, MarkerPos, Position,
+                              Range, get_line_range, iter_direction_values,
+                              resolve_all)
+from xcelios.refs import ReferenceIndex
+from xcelios.sheet import (OccupancyIndex, SheetBounds, ValueIndex,
+                           is_read_only, iter_line_values, move_lines)
+from xcelios.stats import count, timed
+
+
+@timed('move_lines')
 def insert_rows_cols_withref(ws: Worksheet,
                              index: int,
                              axis: Axis,
@@ -14,20 +30,25 @@ def insert_rows_cols_withref(ws: Worksheet,
     """
     Insert the specified amount of rows or columns after the given index.
 
-    TODO: The ``move_range`` OpenPyXL function does not update references
-          outside the moved range. For these another solution is needed.
+    All cells are moved in one pass (see :func:`xcelios.sheet.move_lines`).
+    References to the moved cells in formulas, defined names, merged cells,
+    data validations and conditional formatting are updated using the
+    :class:`xcelios.refs.ReferenceIndex` of the workbook.
 
     :param ws: OpenPyXL worksheet
     :param index: Row/column index
     :param axis: Axis (ROW/COL)
     :param n: Amount of rows/columns
     """
-    if axis == Axis.ROW:
-        rg = Range(index, ws.max_row, ws.min_column, ws.max_column)
-        ws.move_range(str(rg), rows=n, translate=True)
-    else:
-        rg = Range(ws.min_row, ws.max_row, index, ws.max_column)
-        ws.move_range(str(rg), cols=n, translate=True)
+    by_row = axis == Axis.ROW
+    move_lines(ws, index, n, by_row, translate=False)
+    ReferenceIndex.of(ws.parent).shift(ws, index, n, by_row)
+
+    SheetBounds.of(ws).invalidate()
+    ValueIndex.of(ws).invalidate()
+    OccupancyIndex.of(ws).shift(index, n, by_row)
+
+    count('lines_inserted' if n > 0 else 'lines_deleted', abs(n))
 
 
 def delete_rows_cols_withref(ws: Worksheet,
@@ -56,117 +77,307 @@ class Table:
                  obj_class: Type,
                  header_dir: Direction = Direction.RIGHT,
                  body_dir: Direction = Direction.DOWN,
-                 max_blanks: int = 1):
+                 max_blanks: int = 1,
+                 date_formats: Optional[Sequence[str]] = None,
+                 header_values: Optional[Iterable[Any]] = None,
+                 layout_cache: Optional[LayoutCache] = None):
         self.ws = ws
-        self.initial_pos = initial_marker.get_position(self.ws)
+        self.bounds = SheetBounds.of(ws)
+        self.occupancy = OccupancyIndex.of(ws)
+        self.references = ReferenceIndex.of(ws.parent)
+
+        # A cached layout of the same template replaces resolving
+        # the marker and searching the headers
+        layout_key = None
+        layout = None
+        if layout_cache is not None:
+            layout_key = layout_cache.key(ws, initial_marker, obj_class,
+                                          header_dir, body_dir, max_blanks)
+            if layout_key is not None:
+                layout = layout_cache.get(layout_key, ws)
+
+        if layout is not None:
+            self.initial_pos = layout.initial_pos
+        else:
+            self.initial_pos = initial_marker.get_position(self.ws)
         self.obj_class = obj_class
+        self.decoder = get_decoder(obj_class)
         self.header_dir = header_dir
         self.body_dir = body_dir
 
         # Maximum number of blank rows/cols to ignore
         self.max_blanks = max_blanks
 
+        # Formats for parsing date strings (default: DEFAULT_DATE_FORMATS)
+        self.date_formats = date_formats
+
         self.title_positions: Dict[str, Position] = dict()
         self.title_range = Range.from_pos(self.initial_pos, self.initial_pos)
         self.datasets = []
         self.final_pos = self.initial_pos
 
-        self._locate_headers()
+        # Cell values of the table body lines as read by read_datasets
+        # or written by write_datasets (used to skip unchanged cells)
+        self._snapshot: List[tuple] = []
+
+        if layout is not None:
+            self.title_positions = dict(layout.title_positions)
+            self.title_range = layout.title_range
+            return
 
-    def _locate_headers(self):
-        # Read type annotations from dataclass
-        title_rexes = dict()
-        for key in self.obj_class.__annotations__.keys():
-            title_rexes[key] = re.compile(
-                re.escape(key).replace('_', r'[_\- ]?'), re.IGNORECASE)
+        # The values of the header line (starting at the initial position)
+        # can be passed if they were already read, e.g. by SheetReader
+        self._locate_headers(header_values)
+
+        if layout_key is not None:
+            layout_cache.put(
+                layout_key,
+                Layout.of(ws, self.initial_pos, self.title_positions,
+                          self.title_range))
+
+    @timed('locate_headers')
+    def _locate_headers(self, values: Optional[Iterable[Any]] = None):
+        matcher = get_matcher(self.obj_class)
+        remaining = set(matcher.keys)
 
         blanks = 0
-        pos = self.initial_pos
         last_valid_pos = self.initial_pos
+        if values is None:
+            values = iter_direction_values(self.ws, self.initial_pos,
+                                           self.header_dir)
 
         # Stop iteration after encountering more than max_blanks empty cells
         # after eachother, reaching the end of the worksheet
         # or having found all titles
-        while blanks <= self.max_blanks and pos.is_in(self.ws) and title_rexes:
-            val = pos.get_cell(self.ws).value
+        d = -1
+        for d, val in enumerate(values):
+            if blanks > self.max_blanks or not remaining:
+                break
 
             if val:
                 blanks = 0
-                found_key = None
-
-                for key, rex in title_rexes.items():
-                    if rex.match(str(val)):
-                        found_key = key
-                        break
+                found_key = matcher.match(val, remaining)
 
                 if found_key is not None:
+                    pos = self.initial_pos.shifted(self.header_dir, d)
                     self.title_positions[found_key] = pos
-                    title_rexes.pop(found_key)
+                    remaining.discard(found_key)
                     last_valid_pos = pos
             else:
                 blanks += 1
 
-            pos = pos.shifted(self.header_dir)
+        count('cells_read', d + 1)
 
-        if title_rexes:
-            raise TableParseError('Could not find table headers: %s' %
-                                  ', '.join(title_rexes.keys()))
+        if remaining:
+            raise TableParseError(
+                'Could not find table headers: %s' %
+                ', '.join(k for k in matcher.keys if k in remaining))
 
         # Get title range
         self.title_range = Range.from_pos(self.initial_pos, last_valid_pos)
 
     @staticmethod
     def _cast(val: Any, typ: Type) -> Any:
-        # Special case: None
-        if val is None:
-            if typ is str:
-                return ''
-            if typ is int:
-                return 0
-
-        # Special case: datetime
-        if typ == datetime:
-            if isinstance(val, datetime):
-                return val
-            else:
-                # TODO: Parse date strings
-                return None
+        return get_converter(typ)(val)
+
+    @property
+    def _epoch(self) -> datetime:
+        return getattr(self.ws.parent, 'epoch', CALENDAR_WINDOWS_1900)
+
+    @property
+    def _by_row(self) -> bool:
+        return self.body_dir.axis == Axis.COL
+
+    def _fixed_coords(self) -> List[int]:
+        """
+        :return: Column indices (vertical tables) or row indices
+                 (horizontal tables) of the fields in the order of
+                 ``title_positions``
+        """
+        return [
+            tpos.get_coord(self.body_dir.axis)
+            for tpos in self.title_positions.values()
+        ]
+
+    def _iter_body(self) -> Iterator[Tuple[int, tuple]]:
+        """
+        Read the body of the table without creating any cells.
+
+        The set of columns is taken from the title positions once,
+        other cells of the worksheet are skipped.
+
+        :return: Iterator of (line number, values in the order of
+                 ``title_positions``)
+        """
+        lines = get_line_range(self.ws, self.initial_pos, self.body_dir, 1)
+        values = iter_line_values(self.ws, lines, self._fixed_coords(),
+                                  self._by_row)
+
+        return zip(range(1, len(lines) + 1), values)
+
+    def _iter_records(
+        self,
+        body: Optional[Iterable[Tuple[int, tuple]]] = None
+    ) -> Iterator[Tuple[int, tuple]]:
+        """
+        Read the raw values of the non-blank lines of the table body.
+        Stops after encountering more than ``max_blanks`` blank lines.
+
+        ``final_pos`` is updated when the iteration ends.
+
+        :param body: Lines of the table body (see :meth:`_iter_body`) if
+                     they were already read
+        :return: Iterator of (line number, values in the order of
+                 ``title_positions``)
+        """
+        blanks = 0
+        last_line = 0
+        line = 0
+
+        if body is None:
+            body = self._iter_body()
 
         try:
-            return typ(val)
-        except TypeError:
-            return None
+            for line, raw_vals in body:
+                if all(raw_val is None for raw_val in raw_vals):
+                    blanks += 1
+                    if blanks > self.max_blanks:
+                        break
+                    continue
 
+                last_line = line
+                yield line, raw_vals
+        finally:
+            if last_line:
+                self.final_pos = self.initial_pos.shifted(
+                    self.body_dir, last_line)
+            count('cells_read', line * len(self.title_positions))
+
+    def iter_datasets(self) -> Iterator[Any]:
+        """
+        Read the datasets of the table one at a time.
+
+        Unlike :meth:`read_datasets`, the datasets are not stored in
+        ``self.datasets``, so memory usage does not depend on the size
+        of the table. ``final_pos`` is updated when the iteration ends.
+
+        :return: Iterator of ``obj_class`` instances
+        """
+        decode = self.decoder.make_decode(self.title_positions.keys(),
+                                          self.date_formats, self._epoch)
+        records = self._iter_records()
+
+        try:
+            for _, raw_vals in records:
+                yield decode(raw_vals)
+        finally:
+            records.close()
+
+    def iter_batches(self, size: int) -> Iterator[List[Any]]:
+        """
+        Read the datasets of the table in lists of ``size`` items.
+        The last list may be shorter.
+
+        :param size: Number of datasets per batch
+        :return: Iterator of dataset lists
+        """
+        if size < 1:
+            raise ValueError('Batch size must be at least 1')
+
+        batch = []
+        for d in self.iter_datasets():
+            batch.append(d)
+
+            if len(batch) == size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    @timed('read_datasets')
     def read_datasets(self):
+        """
+        Read all datasets of the table into ``self.datasets``.
+
+        The read values are remembered, so :meth:`write_datasets` only has
+        to write the cells that were changed.
+        """
+        self._read_records(self._iter_records())
+
+    def _read_records(self, records: Iterable[Tuple[int, tuple]]):
+        keys = self.title_positions.keys()
+        decode = self.decoder.make_decode(keys, self.date_formats,
+                                          self._epoch)
+        blank = (None, ) * len(keys)
+
         self.datasets = []
+        self._snapshot = []
 
-        line = 1
-        blanks = 0
+        for line, raw_vals in records:
+            # Blank lines inside the table
+            while len(self._snapshot) < line - 1:
+                self._snapshot.append(blank)
+
+            # The decoded values are remembered, so values changed by the
+            # conversion (e.g. blank int cells -> 0) are not written back
+            dataset = decode(raw_vals)
+            self._snapshot.append(
+                tuple(getattr(dataset, key, None) for key in keys))
+            self.datasets.append(dataset)
+
+    def discard_snapshot(self):
+        """
+        Forget the values remembered by :meth:`read_datasets` and
+        :meth:`write_datasets`, so the next call of :meth:`write_datasets`
+        writes all cells of the table.
 
-        while blanks <= self.max_blanks and self.initial_pos.shifted(
-                self.body_dir, line).is_in(self.ws):
-            is_blank = True
-            data = dict()
+        Call this if you modified the cells of the table by other means.
+        """
+        self._snapshot = []
 
-            # Fetch data for the new dataset
-            for key, tpos in self.title_positions.items():
-                pos = tpos.shifted(self.body_dir, line)
-                raw_val = pos.get_cell(self.ws).value
+    def _discard_snapshot_from(self, pos: Position):
+        # Lines from pos on were moved, their remembered values
+        # are not valid anymore
+        line = self.initial_pos.dir_distance(pos, self.body_dir)
+        del self._snapshot[max(line - 1, 0):]
 
-                if raw_val is not None:
-                    is_blank = False
+    @timed('read_columns')
+    def read_columns(self) -> Dict[str, Any]:
+        """
+        Read the table into one NumPy array per field of ``obj_class``
+        instead of creating a dataset object per line.
 
-                val = Table._cast(raw_val, self.obj_class.__annotations__[key])
-                data[key] = val
+        The values are cast using the type annotations of ``obj_class``
+        like in :meth:`read_datasets`. Number and boolean fields are returned
+        as masked arrays where blank cells are masked, datetime fields as
+        ``datetime64`` arrays with ``NaT`` for blank cells and all other
+        fields as object arrays.
 
-            if is_blank:
-                blanks += 1
+        Requires NumPy.
+
+        :return: Dict of field name -> array
+        """
+        keys = list(self.title_positions.keys())
+        converters = self.decoder.get_converters(keys, self.date_formats,
+                                                 self._epoch)
+        raw_cols = [[] for _ in keys]
+
+        for _, raw_vals in self._iter_records():
+            for col, raw_val in zip(raw_cols, raw_vals):
+                col.append(raw_val)
+
+        res = dict()
+        for key, conv, col in zip(keys, converters, raw_cols):
+            if isinstance(conv, DateParser):
+                values = conv.parse_column(col)
             else:
-                # Create new dataset
-                self.datasets.append(self.obj_class(**data))
-                self.final_pos = self.initial_pos.shifted(self.body_dir, line)
+                values = list(map(conv, col))
 
-            line += 1
+            res[key] = to_array(values, col,
+                                resolve_type(self.decoder.types[key]))
+
+        return res
 
     @property
     def initial_length(self) -> int:
@@ -185,16 +396,16 @@ class Table:
         :return: Number of empty rows/cols
         """
         space = None
+        by_row = self.body_dir.axis == Axis.COL
+        step = self.body_dir.d_row + self.body_dir.d_col
+        end = self.final_pos.get_coord(self.header_dir.axis)
 
         for tpos in self.title_positions.values():
-            pos = tpos.combine(self.body_dir.axis,
-                               self.final_pos).shifted(self.body_dir)
-            s = 0
-            while pos.is_in(self.ws) and pos.is_cell_empty(self.ws):
-                pos = pos.shifted(self.body_dir)
-                s += 1
-
-            if not pos.is_cell_empty(self.ws):
+            fixed = tpos.get_coord(self.body_dir.axis)
+            nxt = self.occupancy.next_occupied(fixed, end, step, by_row)
+
+            if nxt is not None:
+                s = abs(nxt - end) - 1
                 if space is None:
                     space = s
                 else:
@@ -213,24 +424,24 @@ class Table:
         t_range = self.table_range
 
         if self.body_dir.axis == Axis.COL:
-            pos = Position(self.ws.min_column, n_row)
-        else:
-            pos = Position(n_row, self.ws.min_row)
-
-        while pos.is_in(self.ws):
-            if not t_range.is_inside(pos) and not pos.is_cell_empty(self.ws):
-                return False
+            return all(
+                t_range.min_col <= col <= t_range.max_col
+                and t_range.min_row <= n_row <= t_range.max_row
+                for col in self.occupancy.cols_in_row(n_row))
 
-            pos = pos.shifted(self.header_dir)
-
-        return True
+        return all(t_range.min_row <= row <= t_range.max_row
+                   and t_range.min_col <= n_row <= t_range.max_col
+                   for row in self.occupancy.rows_in_col(n_row))
 
-    def _adjust_space(self, new_n_rows: int):
+    @timed('adjust_space')
+    def _adjust_space(self, new_n_rows: int) -> Optional[Tuple[int, int]]:
         """
         move other cells in the worksheets so that the space for the
         table matches the number of datasets.
 
         updates ``final_pos`` and ``original_length``.
+
+        :return: (row/col index, amount) of inserted rows/cols or None
         """
         diff_rows = new_n_rows - self.initial_length
 
@@ -239,27 +450,31 @@ class Table:
             return
 
         n_rows = abs(diff_rows)
-        i_pos = self.final_pos
 
-        while True:
-            # If we didn't find non-empty cells after the table, exit
-            if not i_pos.is_in(self.ws):
-                return
+        # If we didn't find non-empty cells after the table, exit
+        if self.final_pos not in self.bounds:
+            return
 
-            next_pos = i_pos.shifted(self.body_dir)
+        by_row = self.body_dir.axis == Axis.COL
+        step = self.body_dir.d_row + self.body_dir.d_col
+        end = self.final_pos.get_coord(self.header_dir.axis)
+        nxt = self.occupancy.next_occupied(
+            self.final_pos.get_coord(self.body_dir.axis), end, step, by_row)
 
-            # If the next cell below the table contains data, exit the loop
-            # This our starting position for the extending/shrinking
-            if not next_pos.is_cell_empty(self.ws):
-                break
-            i_pos = next_pos
+        if nxt is None:
+            return
+
+        # The cell before the next non-empty cell after the table
+        # is our starting position for the extending/shrinking
+        i_pos = self.final_pos.shifted(self.body_dir, abs(nxt - end) - 1)
 
         if diff_rows > 0:
-            self._insert_space(i_pos, n_rows)
-        else:
-            self._remove_space(i_pos, n_rows)
+            return self._insert_space(i_pos, n_rows), n_rows
+
+        self._remove_space(i_pos, n_rows)
+        return None
 
-    def _insert_space(self, i_pos: Position, n_rows: int):
+    def _insert_space(self, i_pos: Position, n_rows: int) -> int:
         # Find a completely empty row where the new rows will be
         # inserted
         pos = i_pos
@@ -269,7 +484,8 @@ class Table:
             if self._is_row_empty(row):
                 insert_rows_cols_withref(self.ws, row, self.header_dir.axis,
                                          n_rows)
-                return
+                self._discard_snapshot_from(pos)
+                return row
 
             pos = pos.shifted(self.body_dir.opposite)
 
@@ -280,29 +496,581 @@ class Table:
         # Preserve the whitespace below the table
         # Stop when encountering a non-empty row to prevent
         # destroying the table layout
+        # All rows are collected first and deleted with a single move
         pos = i_pos.shifted(self.body_dir.opposite, self._get_space())
+        rows = []
+        first_pos = pos
 
-        while pos != self.initial_pos and n_rows > 0:
+        while pos != self.initial_pos and len(rows) < n_rows:
             row = pos.get_coord(self.header_dir.axis)
-            if self._is_row_empty(row):
-                delete_rows_cols_withref(self.ws, row, self.header_dir.axis)
-                n_rows -= 1
-            else:
+            if not self._is_row_empty(row):
                 break
 
+            rows.append(row)
+            first_pos = pos
             pos = pos.shifted(self.body_dir.opposite)
 
-        if n_rows != 0:
-            raise Exception('Could not insert %d rows' % n_rows)
+        if len(rows) != n_rows:
+            raise Exception('Could not insert %d rows' %
+                            (n_rows - len(rows)))
+
+        delete_rows_cols_withref(self.ws, max(rows), self.header_dir.axis,
+                                 n_rows)
+        self._discard_snapshot_from(first_pos)
+
+    def _write_line(self, line: int, fixed: Sequence[int], values: list,
+                    old_values: Optional[tuple]) -> int:
+        """
+        Write the values of a dataset into a line of the table body.
+
+        Cells are accessed directly through the cell storage of the
+        worksheet. Values that equal the remembered value from
+        ``old_values`` are skipped.
+
+        :param line: Row index (vertical tables) or column index
+        :param fixed: Column indices (vertical tables) or row indices
+        :param values: Values in the order of ``fixed``
+        :param old_values: Remembered dataset values or None
+        :return: Number of written cells
+        """
+        cells = self.ws._cells
+        by_row = self._by_row
+        written = 0
+
+        for i, (f, val) in enumerate(zip(fixed, values)):
+            if old_values is not None and _same_value(old_values[i], val):
+                continue
+
+            coord = (line, f) if by_row else (f, line)
+            cell = cells.get(coord)
 
-    def write_datasets(self):
+            if cell is None:
+                if val is None:
+                    continue
+                cell = self.ws.cell(*coord)
+
+            cell.value = val
+            self.occupancy.update(cell)
+            self.references.update(cell)
+            written += 1
+
+        return written
+
+    @timed('write_datasets')
+    def write_datasets(self) -> int:
+        """
+        Write ``self.datasets`` into the worksheet.
+
+        Other cells of the worksheet are moved so that the space of the table
+        matches the number of datasets. Only cells whose value differs from
+        the value read by :meth:`read_datasets` (or written by the last call
+        of this method) are written.
+
+        :return: Number of written cells
+        """
         self._adjust_space(len(self.datasets))
+        return self._write_body(0)
+
+    @timed('extend')
+    def extend(self, datasets: Iterable[Any]) -> int:
+        """
+        Add datasets to the end of the table and write them into the
+        worksheet.
+
+        Only the new lines are written. If there is content after the table,
+        it is moved once to make room for the new lines.
+
+        If the table is not in sync with the worksheet (datasets were added
+        or removed since the last read/write or the table contains blank
+        lines), all datasets are written using :meth:`write_datasets`.
+
+        :param datasets: Datasets to add
+        :return: Number of written cells
+        """
+        first = len(self.datasets)
+        in_sync = first == self.initial_length and \
+            len(self._snapshot) >= first
+
+        self.datasets.extend(datasets)
+
+        if not in_sync:
+            return self.write_datasets()
+        if len(self.datasets) == first:
+            return 0
 
-        r_pos = self.initial_pos
+        # If the rows were inserted inside the table, the lines after them
+        # were moved and have to be written, too
+        if self._adjust_space(len(self.datasets)) is not None:
+            first = min(first, len(self._snapshot))
+
+        return self._write_body(first)
+
+    def append(self, dataset: Any) -> int:
+        """
+        Add a dataset to the end of the table and write it into the
+        worksheet (see :meth:`extend`).
+
+        :param dataset: Dataset to add
+        :return: Number of written cells
+        """
+        return self.extend([dataset])
+
+    def track(self) -> 'DatasetJournal':
+        """
+        Get a list of the datasets recording insertions, replacements and
+        deletions, so :meth:`DatasetJournal.commit` only moves and writes
+        the affected lines of the table.
+
+        :return: DatasetJournal
+        """
+        return DatasetJournal(self)
+
+    def _body_line(self, i: int) -> int:
+        """:return: Row index (vertical tables) or column index of the
+        body line of the dataset with index i"""
+        step = self.body_dir.d_row + self.body_dir.d_col
+        return self.initial_pos.get_coord(self.header_dir.axis) + \
+            step * (i + 1)
+
+    def _lift_line(self, line: int,
+                   fixed: Sequence[int]) -> List[Optional[Cell]]:
+        """
+        Remove the cells of a body line from the worksheet.
+
+        :param line: Row index (vertical tables) or column index
+        :param fixed: Column indices (vertical tables) or row indices
+        :return: Removed cells (None for missing cells)
+        """
+        cells = self.ws._cells
+        lifted = []
+
+        for f in fixed:
+            coord = (line, f) if self._by_row else (f, line)
+            cell = cells.pop(coord, None)
+            if cell is not None:
+                self.occupancy.remove(*coord)
+            lifted.append(cell)
+
+        return lifted
+
+    def _place_line(self, line: int, fixed: Sequence[int],
+                    lifted: Sequence[Optional[Cell]]):
+        """
+        Put cells removed by :meth:`_lift_line` into a body line,
+        replacing the cells of the line.
+
+        :param line: Row index (vertical tables) or column index
+        :param fixed: Column indices (vertical tables) or row indices
+        :param lifted: Cells
+        """
+        cells = self.ws._cells
+
+        for f, cell in zip(fixed, lifted):
+            coord = (line, f) if self._by_row else (f, line)
+            old = cells.pop(coord, None)
+            if old is not None:
+                self._drop_cell(old)
+
+            if cell is None:
+                self.occupancy.remove(*coord)
+                continue
+
+            cell.row, cell.column = coord
+            cells[coord] = cell
+            self.occupancy.update(cell)
+
+    def _drop_cell(self, cell: Cell):
+        # Formulas of removed cells must not be updated anymore
+        cell.value = None
+        self.references.update(cell)
+
+    def _lift_changes(self, origins: Sequence[Optional[int]],
+                      fixed: Sequence[int]) -> Tuple[dict, dict]:
+        """
+        :return: (lifted cells of moved datasets by new index,
+                 lifted cells of the removed lines after the new end
+                 by old index)
+        """
+        moved = {
+            i: self._lift_line(self._body_line(o), fixed)
+            for i, o in enumerate(origins) if o is not None and o != i
+        }
+        sources = {o for o in origins if o is not None}
+        trailing = {
+            o: self._lift_line(self._body_line(o), fixed)
+            for o in range(len(origins), self.initial_length)
+            if o not in sources
+        }
+        return moved, trailing
+
+    def _restore_lifted(self, origins: Sequence[Optional[int]],
+                        fixed: Sequence[int],
+                        moved: Dict[int, List[Optional[Cell]]],
+                        trailing: Dict[int, List[Optional[Cell]]]):
+        """
+        Put lifted cells back to their original lines
+        (if the table could not be resized).
+        """
+        for i, lifted in moved.items():
+            self._place_line(self._body_line(origins[i]), fixed, lifted)
+        for o, lifted in trailing.items():
+            self._place_line(self._body_line(o), fixed, lifted)
+
+    def _lift_shifted(self, origins: Sequence[Optional[int]],
+                      fixed: Sequence[int], index: int,
+                      n: int) -> Dict[int, List[Optional[Cell]]]:
+        """
+        Lift the cells of unchanged datasets that were moved by
+        rows/cols inserted inside the table.
+
+        :param index: Row/col index of the inserted rows/cols
+        :param n: Number of inserted rows/cols
+        :return: Dict of dataset index -> lifted cells
+        """
+        shifted = dict()
+        for i, o in enumerate(origins):
+            line = self._body_line(i)
+            if o == i and line >= index:
+                shifted[i] = self._lift_line(line + n, fixed)
+        return shifted
+
+    @timed('commit')
+    def _apply_changes(self, origins: Sequence[Optional[int]],
+                       dirty: Sequence[bool]) -> int:
+        """
+        Apply the changes recorded by a :class:`DatasetJournal`.
+
+        :param origins: Original index of every dataset (None for
+                        inserted datasets)
+        :param dirty: Datasets to be written
+        :return: Number of written cells
+        """
+        fixed = self._fixed_coords()
+        snapshot = self._snapshot[:self.initial_length]
+
+        # Cells of moved datasets are removed from the worksheet first,
+        # so the table can be resized once and every cell is moved once
+        moved, trailing = self._lift_changes(origins, fixed)
+
+        try:
+            inserted = self._adjust_space(len(origins))
+        except Exception:
+            self._restore_lifted(origins, fixed, moved, trailing)
+            raise
+
+        for cell in itertools.chain.from_iterable(trailing.values()):
+            if cell is not None:
+                self._drop_cell(cell)
+
+        if inserted is not None:
+            moved.update(self._lift_shifted(origins, fixed, *inserted))
+
+        for i, lifted in moved.items():
+            self._place_line(self._body_line(i), fixed, lifted)
+
+        keys = list(self.title_positions.keys())
+        new_snapshot = []
+        written = 0
+
+        for i, o in enumerate(origins):
+            if o is not None and not dirty[i]:
+                new_snapshot.append(snapshot[o])
+                continue
+
+            values = [getattr(self.datasets[i], key, None) for key in keys]
+            written += self._write_line(self._body_line(i), fixed, values,
+                                        None if o is None else snapshot[o])
+            new_snapshot.append(tuple(values))
+
+        self._snapshot = new_snapshot
+        self.final_pos = self.initial_pos.shifted(self.body_dir,
+                                                  len(origins))
+
+        if written or moved or trailing:
+            self.bounds.invalidate()
+            ValueIndex.of(self.ws).invalidate()
+
+        count('cells_written', written)
+        return written
+
+    def _write_body(self, first: int) -> int:
+        """
+        Write the datasets from index ``first`` on into the table body,
+        remember the written values and update ``final_pos``.
+
+        :param first: Index of the first dataset to write. The values of
+                      the lines before have to be remembered.
+        :return: Number of written cells
+        """
+        keys = list(self.title_positions.keys())
+        fixed = self._fixed_coords()
+        start = self.initial_pos.get_coord(self.header_dir.axis)
+        step = self.body_dir.d_row + self.body_dir.d_col
+        snapshot = self._snapshot
+        written = 0
+
+        del snapshot[len(self.datasets):]
+
+        for i in range(first, len(self.datasets)):
+            values = [getattr(self.datasets[i], key, None) for key in keys]
+            line = start + step * (i + 1)
+
+            if i < len(snapshot):
+                written += self._write_line(line, fixed, values, snapshot[i])
+                snapshot[i] = tuple(values)
+            else:
+                written += self._write_line(line, fixed, values, None)
+                snapshot.append(tuple(values))
+
+        self.final_pos = self.initial_pos.shifted(self.body_dir,
+                                                  len(self.datasets))
+
+        if written:
+            self.bounds.invalidate()
+            ValueIndex.of(self.ws).invalidate()
+
+        count('cells_written', written)
+        return written
+
+
+def _same_value(a: Any, b: Any) -> bool:
+    # Values of different types (e.g. 1 and True) are not the same
+    return a.__class__ is b.__class__ and a == b
+
+
+class DatasetJournal(MutableSequence):
+    """
+    List of the datasets of a table that records which datasets were
+    inserted, replaced or deleted. :meth:`commit` applies all changes
+    at once: the table is resized once, the cells of moved datasets are
+    moved (not rewritten) and only new and replaced datasets are written.
+
+    Changes are applied to ``table.datasets`` immediately. Modifications of
+    the attributes of a dataset are not detected, mark the dataset using
+    :meth:`touch`.
+
+    References (formulas, defined names) to the cells of moved datasets
+    are not updated, like with :meth:`Table.write_datasets`. References
+    are only updated for the rows/cols inserted or deleted to resize the
+    table.
+
+    If the table is not in sync with the worksheet (the datasets were not
+    read or written before or the table contains blank lines), all
+    datasets are written using :meth:`Table.write_datasets`.
+
+    Use :meth:`Table.track` to create a journal.
+
+    :param table: Table
+    """
+
+    def __init__(self, table: Table):
+        self.table = table
+        self._reset()
+
+    def _reset(self):
+        n = len(self.table.datasets)
+        self._length = self.table.initial_length
+        self._in_sync = n == self._length and \
+            len(self.table._snapshot) >= n
+
+        # Original index of every dataset (None for inserted datasets)
+        self._origins: List[Optional[int]] = list(range(n))
+        self._dirty: List[bool] = [False] * n
+
+    def __len__(self) -> int:
+        return len(self.table.datasets)
+
+    def __getitem__(self, i: int) -> Any:
+        return self.table.datasets[i]
+
+    def __setitem__(self, i: int, dataset: Any):
+        if isinstance(i, slice):
+            raise TypeError('DatasetJournal does not support slices')
+
+        self.table.datasets[i] = dataset
+        self._dirty[i] = True
+
+    def __delitem__(self, i: int):
+        if isinstance(i, slice):
+            raise TypeError('DatasetJournal does not support slices')
+
+        del self.table.datasets[i]
+        del self._origins[i]
+        del self._dirty[i]
+
+    def insert(self, i: int, dataset: Any):
+        self.table.datasets.insert(i, dataset)
+        self._origins.insert(i, None)
+        self._dirty.insert(i, True)
+
+    def touch(self, i: int):
+        """
+        Mark a dataset as modified, so it is written on commit.
+
+        :param i: Index
+        """
+        self._dirty[i] = True
+
+    @property
+    def changed(self) -> bool:
+        """True if there are changes to be committed"""
+        return any(self._dirty) or \
+            self._origins != list(range(self._length))
+
+    def commit(self) -> int:
+        """
+        Apply the recorded changes to the worksheet.
+
+        References to the cells of moved datasets are not updated.
+
+        :return: Number of written cells
+        """
+        table = self.table
+
+        if self._in_sync and len(self._origins) == len(table.datasets) \
+                and table.initial_length == self._length:
+            written = table._apply_changes(self._origins, self._dirty)
+        else:
+            written = table.write_datasets()
+
+        self._reset()
+        return written
+
+
+class _TableScan:
+    """State of a table while SheetReader sweeps over the rows"""
+
+    def __init__(self, table: Table):
+        self.table = table
+        self.cols = table._fixed_coords()
+        self.header_row = table.initial_pos.row
+        self.body: List[Tuple[int, tuple]] = []
+        self.blanks = 0
+
+    def add_row(self, row: int, get_value) -> bool:
+        """
+        Add a body row.
+
+        :return: False if the end of the table was reached
+        """
+        values = tuple(get_value(c) for c in self.cols)
+        self.body.append((row - self.header_row, values))
+
+        if all(v is None for v in values):
+            self.blanks += 1
+            return self.blanks <= self.table.max_blanks
+        return True
+
+
+class SheetReader:
+    """
+    Reads multiple tables of a worksheet in one pass.
+
+    The markers of all tables are resolved together (see
+    :class:`xcelios.position.MarkerSet`). Tables with headers from left to
+    right and the body below (the default layout) are read during a single
+    iteration over the rows of the worksheet, from the first header row
+    until the end of the last table. Other tables are read one by one.
+
+    :param ws: OpenPyXL worksheet
+    :param specs: Tables to read: ``(marker, obj_class)`` tuples.
+                  A third element can hold a dict of additional
+                  :class:`Table` arguments (e.g. ``max_blanks``).
+    """
+
+    def __init__(self, ws: Worksheet, specs: Sequence[tuple]):
+        self.ws = ws
+        self.specs = list(specs)
+        self.tables: List[Table] = []
+
+    def _iter_rows(self, min_row: int, min_col: int) -> Iterator[tuple]:
+        """
+        Iterate over the rows of the worksheet without creating any cells.
+
+        :return: Iterator of (row index, function col -> cell value)
+        """
+        bounds = SheetBounds.of(self.ws)
+
+        if is_read_only(self.ws):
+            rows = self.ws.iter_rows(min_row=min_row,
+                                     max_row=bounds.max_row,
+                                     min_col=min_col,
+                                     max_col=bounds.max_col,
+                                     values_only=True)
+
+            for row, values in enumerate(rows, min_row):
+                yield row, lambda c, v=values: v[c - min_col] \
+                    if c - min_col < len(v) else None
+        else:
+            get = self.ws._cells.get
+
+            for row in range(min_row, bounds.max_row + 1):
+                yield row, lambda c, r=row: getattr(get((r, c)), 'value',
+                                                    None)
+
+    @timed('sheet_reader')
+    def read(self) -> List[Table]:
+        """
+        Read all tables.
+
+        :return: List of tables (in the order of the specs) with their
+                 datasets read (see :meth:`Table.read_datasets`)
+        """
+        positions = resolve_all(
+            self.ws, {i: spec[0]
+                      for i, spec in enumerate(self.specs)})
+        tables: Dict[int, Table] = dict()
+        pending = dict()
+
+        for i, spec in enumerate(self.specs):
+            kwargs = spec[2] if len(spec) > 2 else dict()
+
+            if kwargs.get('header_dir', Direction.RIGHT) == Direction.RIGHT \
+                    and kwargs.get('body_dir', Direction.DOWN) == \
+                    Direction.DOWN:
+                pending[i] = positions[i]
+            else:
+                pos = positions[i]
+                tables[i] = Table(self.ws, MarkerPos(pos.col, pos.row),
+                                  spec[1], **kwargs)
+                tables[i].read_datasets()
+
+        tables.update(self._sweep(pending))
+
+        self.tables = [tables[i] for i in range(len(self.specs))]
+        return self.tables
+
+    def _sweep(self, positions: Dict[int, Position]) -> Dict[int, Table]:
+        if not positions:
+            return dict()
+
+        max_col = SheetBounds.of(self.ws).max_col
+        min_row = min(pos.row for pos in positions.values())
+        min_col = min(pos.col for pos in positions.values())
+        scans: Dict[int, _TableScan] = dict()
+        active: List[_TableScan] = []
+
+        for row, get_value in self._iter_rows(min_row, min_col):
+            active = [scan for scan in active if scan.add_row(row, get_value)]
+
+            # Tables starting in this row
+            for i, pos in positions.items():
+                if pos.row != row:
+                    continue
+
+                spec = self.specs[i]
+                kwargs = spec[2] if len(spec) > 2 else dict()
+                header = (get_value(c) for c in range(pos.col, max_col + 1))
+                table = Table(self.ws, MarkerPos(pos.col, pos.row), spec[1],
+                              header_values=header, **kwargs)
+
+                scans[i] = _TableScan(table)
+                active.append(scans[i])
+
+            if not active and len(scans) == len(positions):
+                break
 
-        for d in self.datasets:
-            r_pos = r_pos.shifted(self.body_dir)
+        for scan in scans.values():
+            scan.table._read_records(scan.table._iter_records(scan.body))
 
-            for key, hpos in self.title_positions.items():
-                pos = r_pos.combine(self.header_dir.axis, hpos)
-                pos.get_cell(self.ws).value = getattr(d, key, None)
+        return {i: scan.table for i, scan in scans.items()}